@@ -1,21 +1,121 @@
-from flask import Flask, render_template, request, jsonify, session, Response
-from scrapers import AmazonConsoleScraper, DarazConsoleScraper
+from flask import (Flask, render_template, request, jsonify, session, Response, g, before_render_template,
+                   template_rendered)
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.utils import secure_filename
+from scrapers import async_engine_enabled, get_engine, get_scraper, pool_stats
+from scrapers.page_scheduler import COMPLETE_STOP_REASONS
+from services import (ParallelScraper, ResultCache, ResultStore, SingleFlight, JobScheduler, QueueFull,
+                      ProgressRegistry, AnalyticsCache, ResultIndex, ResultIndexCache, MatchCache, SnapshotStore,
+                      PriceHistoryStore, SORT_OPTIONS,
+                      create_cache_backend, create_job_store, format_elapsed, metrics, summarize_results)
+from services.export import EXPORT_FORMATS, csv_chunks, json_chunks, parquet_available, parquet_chunks
 from config import Config
+from models import USD, PKR, Product, json_default
+import asyncio
 import json
+import queue
 import time
 from datetime import datetime
-import pandas as pd
-import csv
-from io import StringIO
-import threading
-import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
 app.secret_key = Config.SECRET_KEY
 
-# Store scraping progress (for large scrapes)
-scraping_progress = {}
+
+def product_json_default(value):
+    """Products serialize as their dicts; everything else the way Flask does it"""
+    if isinstance(value, Product):
+        return value.to_dict()
+    return DefaultJSONProvider.default(value)
+
+app.json.default = product_json_default
+
+# Store scraping progress (for large scrapes), one entry per job and platform
+scraping_progress = ProgressRegistry(ttl=Config.PROGRESS_TTL, max_jobs=Config.PROGRESS_MAX_JOBS)
+
+# Runs every selected platform at the same time
+parallel_scraper = ParallelScraper(max_workers=Config.FANOUT_WORKERS, grace_period=Config.REQUEST_TIMEOUT)
+
+# Recent query results (stale entries are served while they refresh)
+result_cache = ResultCache(
+    create_cache_backend(Config.CACHE_BACKEND, path=Config.CACHE_PATH,
+                         max_entries=Config.CACHE_MAX_ENTRIES, max_bytes=Config.CACHE_MAX_BYTES),
+    ttl=Config.CACHE_TTL
+)
+
+# Page-by-page snapshots of scraped queries for incremental refreshes
+snapshots = SnapshotStore(
+    create_cache_backend(Config.CACHE_BACKEND, path=Config.SNAPSHOT_PATH,
+                         max_entries=Config.SNAPSHOT_MAX_ENTRIES, max_bytes=Config.SNAPSHOT_MAX_BYTES),
+    unchanged_pages=Config.REFRESH_UNCHANGED_PAGES
+)
+
+# Price and rating observations of every scraped product (None when disabled)
+price_history = PriceHistoryStore(Config.PRICE_HISTORY_PATH, raw_retention=Config.PRICE_HISTORY_RAW_RETENTION,
+                                  retention=Config.PRICE_HISTORY_RETENTION,
+                                  compact_interval=Config.PRICE_HISTORY_COMPACT_INTERVAL
+                                  ) if Config.PRICE_HISTORY_ENABLED else None
+
+# Identical scrapes running at the same time share one scrape
+single_flight = SingleFlight()
+
+# Products of async searches, kept until the retention policy evicts them
+job_store = create_job_store(Config.JOB_STORE, path=Config.JOB_STORE_PATH,
+                             max_age=Config.JOB_RETENTION, max_jobs=Config.JOB_MAX_JOBS)
+
+# Results of /search; the session cookie only keeps their id
+result_store = ResultStore(job_store, max_cached=Config.RESULT_CACHE_ENTRIES)
+
+# Summary statistics per finished result set, computed once
+analytics = AnalyticsCache(max_entries=Config.ANALYTICS_CACHE_ENTRIES, histogram_bins=Config.PRICE_HISTOGRAM_BINS)
+
+# Sort orders per finished result set for filtered/sorted pages of products
+result_indexes = ResultIndexCache(max_entries=Config.RESULT_INDEX_ENTRIES)
+
+# Amazon <-> Daraz product pairs per finished result set, matched on first use
+product_matches = MatchCache(max_entries=Config.MATCH_CACHE_ENTRIES, top_k=Config.MATCH_TOP_K,
+                             min_score=Config.MATCH_MIN_SCORE, max_price_ratio=Config.MATCH_MAX_PRICE_RATIO,
+                             dim=Config.MATCH_VECTOR_DIM, batch_size=Config.MATCH_BATCH_SIZE)
+
+# Worker pool and bounded queue for async searches
+job_scheduler = JobScheduler(workers=Config.JOB_WORKERS, max_queue=Config.JOB_QUEUE_SIZE,
+                             platform_limits=Config.PLATFORM_JOB_LIMITS)
+
+# Route, rendering and queue metrics for /metrics (the scrapers register their own)
+REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'Flask request time', ('endpoint', 'method', 'status'))
+RENDER_SECONDS = metrics.histogram('template_render_seconds', 'Jinja rendering time', ('template',))
+SEARCH_PLATFORM_SECONDS = metrics.histogram('search_platform_seconds', 'Scrape time per platform in a search',
+                                            ('platform', 'status'), buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600))
+metrics.gauge('job_queue_depth', 'Async searches waiting for a worker').set_function(
+    lambda: job_scheduler.stats()['queue_depth'])
+metrics.gauge('job_queue_running', 'Async searches running').set_function(lambda: job_scheduler.stats()['running'])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                                method=request.method, status=response.status_code)
+    return response
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        RENDER_SECONDS.observe(time.perf_counter() - started, template=template.name or 'string')
+
+def record_platform_status(status):
+    """Observe per-platform scrape times of a search"""
+    for platform, info in status.items():
+        SEARCH_PLATFORM_SECONDS.observe(info['elapsed'], platform=platform, status=info['status'])
 
 # Template filters
 @app.template_filter('format_price')
@@ -55,71 +155,199 @@ def truncate_title(title, length=80):
         return title[:length] + "..."
     return title
 
+def queue_progress(session_id, platform):
+    """Create the progress entry for a platform whose job is waiting in the queue"""
+    scraping_progress.create(session_id, platform, status='queued', message='Waiting for a free worker...')
+
+def start_progress(session_id, platform):
+    """Mark one platform of an async search as started"""
+    scraping_progress.create(session_id, platform)
+    scraping_progress.set(session_id, platform, status='in_progress', message=f'Starting {platform} scrape...')
+
+def set_currency(platform, products):
+    """Ensure currency is set"""
+    for p in products:
+        p['currency'] = USD if platform == 'amazon' else PKR
+
+def record_prices(platform, products):
+    """Queue a fresh scrape's price observations for the history store (one transaction per scrape)"""
+    if price_history is not None and products:
+        price_history.record_in_background(platform, products)
+
+def finish_progress(session_id, platform, products):
+    """Mark an async platform scrape as completed"""
+    set_currency(platform, products)
+    record_prices(platform, products)
+    
+    scraping_progress.set(session_id, platform, status='completed', products_found=len(products),
+                          message=f'Completed! Found {len(products)} products')
+
+def fail_progress(session_id, platform, error):
+    """Mark an async platform scrape as failed"""
+    scraping_progress.set(session_id, platform, status='error', message=f'Error: {str(error)}')
+
+def publish_page(session_id, platform, page, products):
+    """Push a freshly parsed page to clients streaming this search"""
+    set_currency(platform, products)
+    scraping_progress.publish(session_id, 'products', {'platform': platform, 'page': page, 'products': products})
+
+def share_progress(session_id, platform, leader_session_id):
+    """Point a coalesced scrape's progress entry at the scrape it joined; False if it has none"""
+    return scraping_progress.share(session_id, platform, leader_session_id, platform)
+
+def async_scrape_key(platform, query, pages):
+    """Single-flight key of async job scrapes; /search scrapes use their own (deadline-bound) keys"""
+    return ResultCache.make_key(platform, query, pages) + '|job'
+
 def scrape_platform_async(platform, query, pages, session_id):
     """Async scraping function with progress tracking"""
-    global scraping_progress
+    start_progress(session_id, platform)
     
-    scraping_progress[session_id] = {
-        'platform': platform,
-        'status': 'in_progress',
-        'current_page': 0,
-        'total_pages': 0,
-        'products_found': 0,
-        'message': f'Starting {platform} scrape...'
-    }
+    def run():
+        try:
+            scraper = get_scraper(platform)
+            if scraper:
+                products = scraper.search_products(
+                    query, pages,
+                    progress_callback=lambda p, t, c: update_progress(session_id, platform, p, t, c),
+                    page_callback=lambda page, page_products: publish_page(session_id, platform, page, page_products)
+                )
+            else:
+                products = []
+            
+            finish_progress(session_id, platform, products)
+            return products
+            
+        except Exception as e:
+            fail_progress(session_id, platform, e)
+            return []
+    
+    # Identical scrapes already running are joined instead of started again. Without a
+    # leader entry to share, the follower finishes its own progress entry
+    unshared = []
+    products = single_flight.do(async_scrape_key(platform, query, pages), run, context=session_id,
+                                on_join=lambda leader_session_id: share_progress(session_id, platform, leader_session_id)
+                                or unshared.append(True))
+    if unshared:
+        finish_progress(session_id, platform, products)
+    return products
+
+async def scrape_platform_coroutine(platform, query, pages, session_id):
+    """scrape_platform_async for the shared event loop (no thread per job)"""
+    start_progress(session_id, platform)
     
-    try:
-        if platform == 'amazon':
-            scraper = AmazonConsoleScraper()
-            products = scraper.search_products(query, pages, progress_callback=lambda p, t, c: update_progress(session_id, p, t, c))
-        elif platform == 'daraz':
-            scraper = DarazConsoleScraper()
-            products = scraper.search_products(query, pages, progress_callback=lambda p, t, c: update_progress(session_id, p, t, c))
-        else:
-            products = []
-        
-        # Ensure currency is set
-        for p in products:
-            p['currency'] = 'USD' if platform == 'amazon' else 'PKR'
-        
-        scraping_progress[session_id]['status'] = 'completed'
-        scraping_progress[session_id]['products_found'] = len(products)
-        scraping_progress[session_id]['message'] = f'Completed! Found {len(products)} products'
-        
-        return products
-        
-    except Exception as e:
-        scraping_progress[session_id]['status'] = 'error'
-        scraping_progress[session_id]['message'] = f'Error: {str(e)}'
-        return []
+    async def run():
+        try:
+            scraper = get_scraper(platform)
+            if not scraper:
+                return []
+            
+            products = await scraper.search_products_async(
+                query, pages,
+                progress_callback=lambda p, t, c: update_progress(session_id, platform, p, t, c),
+                page_callback=lambda page, page_products: publish_page(session_id, platform, page, page_products)
+            )
+            finish_progress(session_id, platform, products)
+            return products
+            
+        except Exception as e:
+            fail_progress(session_id, platform, e)
+            return []
+    
+    unshared = []
+    products = await single_flight.do_async(async_scrape_key(platform, query, pages), run, context=session_id,
+                                            on_join=lambda leader_session_id: share_progress(session_id, platform, leader_session_id)
+                                            or unshared.append(True))
+    if unshared:
+        finish_progress(session_id, platform, products)
+    return products
 
-def update_progress(session_id, page, total, count):
+def update_progress(session_id, platform, page, total, count):
     """Update scraping progress"""
-    global scraping_progress
-    if session_id in scraping_progress:
-        scraping_progress[session_id]['current_page'] = page
-        scraping_progress[session_id]['total_pages'] = total
-        scraping_progress[session_id]['products_found'] = count
-        scraping_progress[session_id]['message'] = f'Scraping page {page}... Found {count} products so far'
-
-def scrape_platform(platform, query, pages=None):
+    scraping_progress.set(session_id, platform, current_page=page, total_pages=total, products_found=count,
+                          message=f'Scraping page {page}... Found {count} products so far')
+
+def scrape_platform(platform, query, pages=None, deadline=None, stop_callback=None):
     """Scrape products from specified platform (unlimited pages if pages=None)"""
     if platform == 'amazon':
-        scraper = AmazonConsoleScraper()
-        products = scraper.search_products(query, pages)
+        products = get_scraper('amazon').search_products(query, pages, deadline=deadline, stop_callback=stop_callback)
         # Ensure currency is set
         for p in products:
-            p['currency'] = 'USD'
+            p['currency'] = USD
+        record_prices(platform, products)
         return products
     elif platform == 'daraz':
-        scraper = DarazConsoleScraper()
-        products = scraper.search_products(query, pages)
+        products = get_scraper('daraz').search_products(query, pages, deadline=deadline, stop_callback=stop_callback)
         # Ensure currency is set
         for p in products:
-            p['currency'] = 'PKR'
+            p['currency'] = PKR
+        record_prices(platform, products)
         return products
     return []
 
+def scrape_pages(platform, query, pages=None, deadline=None, stop_callback=None):
+    """(page, products) of a scrape as each page is parsed, with the currency set like scrape_platform"""
+    for page, products in get_scraper(platform).iter_pages(query, pages, deadline, stop_callback):
+        set_currency(platform, products)
+        yield page, products
+
+def refresh_platform(platform, query, pages=None, deadline=None):
+    """Re-scrape a query only until its pages match the last snapshot, and return the changes"""
+    fetched = []
+    stop = {}
+    
+    def pages_seen():
+        for page, products in scrape_pages(platform, query, pages, deadline, stop_callback=lambda reason: stop.update(reason=reason)):
+            fetched.extend(products)
+            yield page, products
+    
+    changes = snapshots.refresh(platform, query, pages, pages_seen(), stop_reason=lambda: stop.get('reason'))
+    record_prices(platform, fetched)
+    return changes
+
+def index_results(result_id, results):
+    """Precompute the statistics and sort orders of a finished result set"""
+    analytics.compute(result_id, results)
+    result_indexes.build(result_id, results)
+
+def compare_context(result_id, load):
+    """
+    Template context of compare.html: the first page of each grid (the page fetches the
+    rest from /api/results/<id>/query) and the cached statistics. None if the result set is gone.
+    """
+    index = result_indexes.get(result_id, load=load)
+    stats = analytics.get(result_id, load=load)
+    if index is None or stats is None:
+        return None
+    return {
+        'result_id': result_id,
+        'pages': {grid: index.query(platform=None if grid == 'all' else grid, limit=Config.RESULTS_PAGE_SIZE)
+                  for grid in ('all', 'amazon', 'daraz')},
+        'page_size': Config.RESULTS_PAGE_SIZE,
+        'stats': stats,
+        'total_amazon': stats['amazon']['count'] if 'amazon' in stats else 0,
+        'total_daraz': stats['daraz']['count'] if 'daraz' in stats else 0
+    }
+
+def cached_scrape_platform(platform, query, pages=None, deadline=None):
+    """scrape_platform behind the result cache (partial results are not cached)"""
+    key = ResultCache.make_key(platform, query, pages)
+    # Only results that ran to max_pages or the end of the results are cached, not ones cut short by
+    # the deadline or a failed page. A call that joins another's scrape leaves this empty; the leader caches.
+    stop = {}
+    
+    def record_stop(reason):
+        stop['reason'] = reason
+    
+    return result_cache.get_or_scrape(
+        platform, query, pages,
+        lambda: single_flight.do(key, lambda: scrape_platform(platform, query, pages, deadline=deadline,
+                                                              stop_callback=record_stop)),
+        refresh_fn=lambda: single_flight.do(key, lambda: scrape_platform(platform, query, pages,
+                                                                         stop_callback=record_stop)),
+        cacheable=lambda products: stop.get('reason') in COMPLETE_STOP_REASONS
+    )
+
 @app.route('/')
 def index():
     """Home page with search form"""
@@ -147,48 +375,39 @@ def search():
         except:
             pages = None
     
-    results = {}
-    total_products = 0
+    platforms = [p for p in platforms if p in ['amazon', 'daraz']]
+    
+    print(f"\n{'='*50}")
+    print(f"Starting {', '.join(platforms)} scrape for: '{query}'")
+    print(f"{'='*50}")
+    
+    # Scrape from selected platforms in parallel
+    results, status = parallel_scraper.run(cached_scrape_platform, platforms, query, pages, deadline=Config.PLATFORM_DEADLINE)
+    record_platform_status(status)
+    total_products = sum(len(products) for products in results.values())
     
-    # Scrape from selected platforms
     for platform in platforms:
-        if platform in ['amazon', 'daraz']:
-            print(f"\n{'='*50}")
-            print(f"Starting {platform} scrape for: '{query}'")
-            print(f"{'='*50}")
-            
-            start_time = time.time()
-            products = scrape_platform(platform, query, pages)
-            elapsed_time = time.time() - start_time
-            
-            results[platform] = products
-            total_products += len(products)
-            
-            minutes = int(elapsed_time // 60)
-            seconds = int(elapsed_time % 60)
-            
-            print(f"\n✅ Completed {platform}: {len(products)} products in {minutes}m {seconds}s")
+        print(f"\n✅ Completed {platform}: {len(results[platform])} products in {format_elapsed(status[platform]['elapsed'])} ({status[platform]['status']})")
     
-    # Store results in session
+    # Store results server-side and keep only their id in the session
+    session.pop('last_results', None)  # Left over in cookies from before the result store
     session['last_query'] = query
-    session['last_results'] = results
+    session['result_id'] = result_store.save(query, results)
+    index_results(session['result_id'], results)
     session['total_products'] = {
         'amazon': len(results.get('amazon', [])),
         'daraz': len(results.get('daraz', []))
     }
     session['scrape_time'] = {
-        'amazon': f"{int((time.time() - start_time)//60)}m {int((time.time() - start_time)%60)}s" if platforms else "0s",
-        'daraz': f"{int((time.time() - start_time)//60)}m {int((time.time() - start_time)%60)}s" if platforms else "0s"
+        platform: format_elapsed(status[platform]['elapsed']) if platform in status else "0s"
+        for platform in ['amazon', 'daraz']
     }
     
     return render_template('compare.html', 
                          query=query,
-                         amazon_results=results.get('amazon', []),
-                         daraz_results=results.get('daraz', []),
-                         total_amazon=len(results.get('amazon', [])),
-                         total_daraz=len(results.get('daraz', [])),
                          total_products=total_products,
-                         timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                         timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                         **compare_context(session['result_id'], lambda: results))
 
 @app.route('/api/search', methods=['POST'])
 def api_search():
@@ -201,19 +420,16 @@ def api_search():
     if not query:
         return jsonify({'error': 'Please enter a search term'}), 400
     
-    results = {}
-    total_products = 0
-    
-    for platform in platforms:
-        if platform in ['amazon', 'daraz']:
-            products = scrape_platform(platform, query, pages)
-            results[platform] = products
-            total_products += len(products)
+    platforms = [p for p in platforms if p in ['amazon', 'daraz']]
+    results, status = parallel_scraper.run(cached_scrape_platform, platforms, query, pages, deadline=Config.PLATFORM_DEADLINE)
+    record_platform_status(status)
+    total_products = sum(len(products) for products in results.values())
     
     return jsonify({
         'query': query,
         'results': results,
         'total_products': total_products,
+        'platform_status': status,
         'platform_counts': {
             'amazon': len(results.get('amazon', [])),
             'daraz': len(results.get('daraz', []))
@@ -221,6 +437,36 @@ def api_search():
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
 
+@app.route('/api/search/refresh', methods=['POST'])
+def api_search_refresh():
+    """Incremental re-scrape: added, removed and re-priced products since the query's last refresh"""
+    data = request.get_json()
+    query = data.get('query', '').strip()
+    platforms = data.get('platforms', ['amazon', 'daraz'])
+    pages = data.get('pages', None)  # None means all pages (until the snapshot matches)
+    
+    if not query:
+        return jsonify({'error': 'Please enter a search term'}), 400
+    
+    platforms = [p for p in platforms if p in ['amazon', 'daraz']]
+    changes, status = parallel_scraper.run(refresh_platform, platforms, query, pages, deadline=Config.PLATFORM_DEADLINE)
+    record_platform_status(status)
+    
+    for platform in platforms:
+        print(f"🔄 Refreshed {platform}: {changes[platform].get('pages_fetched', 0) if changes[platform] else 0} pages "
+              f"in {format_elapsed(status[platform]['elapsed'])} ({status[platform]['status']})")
+    
+    return jsonify({
+        'query': query,
+        'platforms': {platform: changes[platform] or None for platform in platforms},
+        'platform_status': status,
+        'change_counts': {
+            platform: {kind: len(changes[platform][kind]) for kind in ('added', 'removed', 'price_changed')}
+            for platform in platforms if changes[platform]
+        },
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
 @app.route('/api/search/async', methods=['POST'])
 def api_search_async():
     """Async JSON API endpoint for large searches"""
@@ -235,35 +481,246 @@ def api_search_async():
     # Generate unique session ID
     session_id = f"{query}_{datetime.now().timestamp()}"
     
-    # Start scraping in background thread
+    platforms = [p for p in platforms if p in ['amazon', 'daraz']]
+    
+    try:
+        priority = int(data.get('priority', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'priority must be an integer'}), 400
+    
+    results = {}
+    
+    def scrape_and_store(platform, query, pages, deadline=None):
+        products = scrape_platform_async(platform, query, pages, session_id)
+        job_store.save_results(session_id, platform, products)
+        return products
+    
+    # Platforms are scraped in parallel, like /search
     def scrape_all():
-        results = {}
-        for platform in platforms:
-            if platform in ['amazon', 'daraz']:
-                products = scrape_platform_async(platform, query, pages, f"{session_id}_{platform}")
-                results[platform] = products
-        # Store results somewhere (database, file, etc.)
+        results, _ = parallel_scraper.run(scrape_and_store, platforms, query, pages)
+        job_store.finish_job(session_id)
+        index_results(session_id, results)
+    
+    # Same job as a coroutine; all jobs share one event loop and connection pool
+    async def scrape_all_coroutine():
+        loop = asyncio.get_running_loop()
+        
+        async def scrape_and_store(platform):
+            results[platform] = await scrape_platform_coroutine(platform, query, pages, session_id)
+            await loop.run_in_executor(None, job_store.save_results, session_id, platform, results[platform])
+        
+        await asyncio.gather(*(scrape_and_store(platform) for platform in platforms))
+        await loop.run_in_executor(None, job_store.finish_job, session_id)
+        await loop.run_in_executor(None, index_results, session_id, results)
+    
+    # The job returns the engine's future, so the scheduler thread is free while it runs
+    if async_engine_enabled():
+        job = lambda: get_engine().submit(scrape_all_coroutine())
+    else:
+        job = scrape_all
+    
+    job_store.create_job(session_id, query, platforms)
+    for platform in platforms:
+        queue_progress(session_id, platform)
+    
+    # Queue the job for the worker pool
+    try:
+        job_scheduler.submit(session_id, job, priority=priority, platforms=platforms)
+    except QueueFull as e:
+        job_store.delete_job(session_id)
+        scraping_progress.remove(session_id)
         
-    thread = threading.Thread(target=scrape_all)
-    thread.start()
+        response = jsonify({'error': 'Too many searches in progress, please retry later', 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
     
     return jsonify({
         'session_id': session_id,
-        'status': 'started',
-        'message': 'Scraping started. Check progress using /api/progress/<session_id>',
+        'status': 'queued',
+        'message': 'Scraping queued. Stream progress from /api/stream/<session_id> (or poll /api/progress/<session_id>) and fetch products from /api/results/<session_id>',
+        'queue': job_scheduler.job_info(session_id),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+def format_stream_event(event, data, stream_format):
+    """Encode one stream event as SSE or as an NDJSON line"""
+    if stream_format == 'ndjson':
+        return json.dumps({'event': event, 'data': data}, default=json_default) + '\n'
+    return f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+
+@app.route('/api/stream/<session_id>')
+def stream_progress(session_id):
+    """Stream progress updates and each page's products (SSE, or NDJSON with ?format=ndjson)"""
+    if scraping_progress.get(session_id) is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    stream_format = request.args.get('format', 'sse')
+    events = scraping_progress.subscribe(session_id)
+    
+    def generate():
+        try:
+            # Current state first, then live events until every platform is done
+            yield format_stream_event('snapshot', {'job_id': session_id, 'platforms': scraping_progress.get(session_id)}, stream_format)
+            
+            while not scraping_progress.is_done(session_id) or not events.empty():
+                try:
+                    item = events.get(timeout=Config.STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ': keep-alive\n\n' if stream_format == 'sse' else '\n'
+                    continue
+                yield format_stream_event(item['event'], item['data'], stream_format)
+            
+            yield format_stream_event('done', {'job_id': session_id, 'platforms': scraping_progress.get(session_id)}, stream_format)
+        finally:
+            scraping_progress.unsubscribe(session_id, events)
+    
+    mimetype = 'application/x-ndjson' if stream_format == 'ndjson' else 'text/event-stream'
+    return Response(generate(), mimetype=mimetype, headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/results/<session_id>')
+def get_results(session_id):
+    """Stored products of an async search, one page at a time"""
+    job = job_store.get_job(session_id)
+    if not job:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    platform = request.args.get('platform')
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(Config.RESULTS_MAX_PAGE_SIZE, max(1, int(request.args.get('limit', Config.RESULTS_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    
+    products, total = job_store.get_products(session_id, platform=platform, offset=offset, limit=limit, fields=fields)
+    next_offset = offset + len(products)
+    
+    return jsonify({
+        'session_id': session_id,
+        'query': job['query'],
+        'status': job['status'],
+        'platform_counts': job['counts'],
+        'platform': platform,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'next_offset': next_offset if next_offset < total else None,
+        'products': products,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+@app.route('/api/results/<session_id>/query')
+def query_results(session_id):
+    """Filtered and sorted products of a stored result set, one page per cursor"""
+    job = job_store.get_job(session_id)
+    if not job:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    sort = request.args.get('sort', '')
+    if sort not in SORT_OPTIONS:
+        return jsonify({'error': f"sort must be one of: {', '.join(s for s in SORT_OPTIONS if s)}"}), 400
+    platform = request.args.get('platform', '')
+    platform = None if platform in ('', 'all') else platform
+    text = request.args.get('q', '')
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    try:
+        cursor = max(0, int(request.args.get('cursor', 0)))
+        limit = min(Config.RESULTS_MAX_PAGE_SIZE, max(1, int(request.args.get('limit', Config.RESULTS_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({'error': 'cursor and limit must be integers'}), 400
+    
+    if job['status'] == 'in_progress':
+        # Partial results change with every page, so they are indexed without caching
+        index = ResultIndex(job_store.get_all_products(session_id))
+    else:
+        index = result_indexes.get(session_id, load=lambda: job_store.get_all_products(session_id))
+    
+    page = index.query(sort=sort, platform=platform, text=text, cursor=cursor, limit=limit)
+    products = page['products']
+    if fields:
+        products = [{field: product.get(field) for field in fields} for product in products]
+    
+    return jsonify({
+        'session_id': session_id,
+        'query': job['query'],
+        'status': job['status'],
+        'sort': sort,
+        'platform': platform,
+        'q': text,
+        'cursor': cursor,
+        'limit': limit,
+        'total': page['total'],
+        'next_cursor': page['next_cursor'],
+        'products': products,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+@app.route('/api/results/<session_id>/products/<platform>/<product_id>/similar')
+def similar_products(session_id, platform, product_id):
+    """Products of the same result set with the most similar titles (optionally only on ?target=)"""
+    job = job_store.get_job(session_id)
+    if not job:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    target = request.args.get('target') or None
+    try:
+        limit = min(Config.RESULTS_MAX_PAGE_SIZE, max(1, int(request.args.get('limit', 10))))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    if job['status'] == 'in_progress':
+        index = ResultIndex(job_store.get_all_products(session_id))
+    else:
+        index = result_indexes.get(session_id, load=lambda: job_store.get_all_products(session_id))
+    
+    matches = index.similar(platform, product_id, target=target, limit=limit)
+    if matches is None:
+        return jsonify({'error': 'Product not found'}), 404
+    
+    return jsonify({
+        'session_id': session_id,
+        'product': index.lookup(platform, product_id),
+        'target': target,
+        'similar': matches,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+@app.route('/api/results/<session_id>/matches')
+def get_matches(session_id):
+    """Amazon <-> Daraz pairs of the same product in a finished result set, best match first"""
+    job = job_store.get_job(session_id)
+    if not job:
+        return jsonify({'error': 'Session not found'}), 404
+    if job['status'] == 'in_progress':
+        return jsonify({'error': 'Search is still in progress'}), 409
+    
+    try:
+        min_score = float(request.args.get('min_score', 0))
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(Config.RESULTS_MAX_PAGE_SIZE, max(1, int(request.args.get('limit', Config.RESULTS_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({'error': 'min_score must be a number, offset and limit integers'}), 400
+    
+    matches = product_matches.get(session_id, load=lambda: job_store.get_all_products(session_id))
+    pairs = [pair for pair in matches.pairs if pair['score'] >= min_score] if min_score else matches.pairs
+    next_offset = offset + limit
+    
+    return jsonify({
+        'session_id': session_id,
+        'query': job['query'],
+        'offset': offset,
+        'limit': limit,
+        'total': len(pairs),
+        'next_offset': next_offset if next_offset < len(pairs) else None,
+        'matches': pairs[offset:next_offset],
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
 
 @app.route('/api/progress/<session_id>')
 def get_progress(session_id):
     """Get scraping progress for async search"""
-    global scraping_progress
-    
     # Return progress for all platforms in this session
-    platform_progress = {}
-    for key, value in scraping_progress.items():
-        if key.startswith(session_id):
-            platform_progress[key.replace(f"{session_id}_", "")] = value
+    platform_progress = scraping_progress.get(session_id)
     
     if not platform_progress:
         return jsonify({'error': 'Session not found'}), 404
@@ -274,86 +731,177 @@ def get_progress(session_id):
         'session_id': session_id,
         'all_completed': all_completed,
         'platforms': platform_progress,
+        'queue': job_scheduler.job_info(session_id),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+def parse_history_time(value):
+    """Epoch seconds from a query parameter: a number, 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+@app.route('/api/history/<platform>/<asin>')
+def get_price_history(platform, asin):
+    """Price and rating history of one product (?start, ?end, ?resolution in seconds)"""
+    if price_history is None:
+        return jsonify({'error': 'Price history is disabled (PRICE_HISTORY_ENABLED)'}), 501
+    
+    try:
+        start = parse_history_time(request.args.get('start'))
+        end = parse_history_time(request.args.get('end'))
+        resolution = int(request.args.get('resolution', 0)) or None
+    except ValueError:
+        return jsonify({'error': 'start/end must be epoch seconds or YYYY-MM-DD[ HH:MM:SS], resolution an integer'}), 400
+    if resolution is not None and resolution < 1:
+        return jsonify({'error': 'resolution must be positive'}), 400
+    
+    history = price_history.history(platform, asin, start=start, end=end, resolution=resolution)
+    if history is None:
+        return jsonify({'error': 'No price history for this product'}), 404
+    
+    history['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return jsonify(history)
+
+@app.route('/api/stats/cache')
+def get_cache_stats():
+    """Result cache hit/miss counters and size, plus coalesced scrapes"""
+    return jsonify({
+        'cache': result_cache.stats(),
+        'single_flight': single_flight.stats(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+@app.route('/api/stats/queue')
+def get_queue_stats():
+    """Async search worker pool and queue depth"""
+    return jsonify({
+        'queue': job_scheduler.stats(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics: fetch/parse/render histograms, HTTP statuses, retries, cache and queue"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/stats/pool')
+def get_pool_stats():
+    """Connection reuse for the shared HTTP pools"""
+    return jsonify({
+        'pools': pool_stats(),
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
 
 
 @app.route('/export/summary')
 def export_summary():
-    """Export summary statistics"""
-    results = session.get('last_results', {})
+    """Export summary statistics (computed once per result set)"""
+    result_id = session.get('result_id')
     query = session.get('last_query', 'search')
     
-    if not results:
+    platforms = analytics.get(result_id, load=lambda: result_store.load(result_id)) if result_id else None
+    if not platforms:
         return jsonify({'error': 'No results to export'}), 404
     
-    summary = {
+    return jsonify({
         'query': query,
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_products': 0,
-        'platforms': {}
-    }
+        'total_products': sum(stats['count'] for stats in platforms.values()),
+        'platforms': platforms
+    })
+
+@app.route('/export/<export_format>')
+def export_results(export_format):
+    """Stream the products of the last search (or of ?session_id=) as CSV, JSON or Parquet"""
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown export format: {export_format}'}), 404
+    if export_format == 'parquet' and not parquet_available():
+        return jsonify({'error': 'Parquet export needs pyarrow (pip install pyarrow)'}), 501
+    
+    session_id = request.args.get('session_id') or session.get('result_id')
+    job = job_store.get_job(session_id) if session_id else None
+    if not job:
+        return jsonify({'error': 'No results to export'}), 404
     
-    for platform, products in results.items():
-        if not products:
-            continue
-            
-        # Calculate statistics
-        prices = [p.get('price_numeric', 0) for p in products if p.get('price_numeric', 0) > 0]
-        ratings = [p.get('rating_numeric', 0) for p in products if p.get('rating_numeric', 0) > 0]
-        sponsored = sum(1 for p in products if p.get('is_sponsored', False))
-        
-        summary['platforms'][platform] = {
-            'count': len(products),
-            'avg_price': sum(prices) / len(prices) if prices else 0,
-            'min_price': min(prices) if prices else 0,
-            'max_price': max(prices) if prices else 0,
-            'avg_rating': sum(ratings) / len(ratings) if ratings else 0,
-            'sponsored_count': sponsored,
-            'sponsored_percentage': (sponsored / len(products) * 100) if products else 0
-        }
-        
-        summary['total_products'] += len(products)
+    # Rows are read from the store batch by batch while the response is sent
+    batches = job_store.iter_products(session_id, platform=request.args.get('platform'),
+                                      batch_size=Config.EXPORT_BATCH_SIZE)
+    if export_format == 'csv':
+        body = csv_chunks(batches)
+    elif export_format == 'json':
+        body = json_chunks(batches, {'query': job['query'], 'session_id': session_id, 'status': job['status'],
+                                     'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+    else:
+        body = parquet_chunks(batches)
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f"{secure_filename(job['query']) or 'results'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return Response(body, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/api/analytics/<session_id>')
+def get_analytics(session_id):
+    """Price, rating, sponsored and discount statistics of a stored result set"""
+    job = job_store.get_job(session_id)
+    if not job:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    if job['status'] == 'in_progress':
+        # Partial results change with every page, so they are summarized without caching
+        platforms = summarize_results(job_store.get_all_products(session_id), Config.PRICE_HISTOGRAM_BINS)
+    else:
+        platforms = analytics.get(session_id, load=lambda: job_store.get_all_products(session_id))
     
-    return jsonify(summary)
+    return jsonify({
+        'session_id': session_id,
+        'query': job['query'],
+        'status': job['status'],
+        'total_products': sum(stats['count'] for stats in platforms.values()),
+        'platforms': platforms,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
 
 @app.route('/compare')
 def compare():
     """Redirect to index if no results"""
-    if 'last_results' not in session:
+    result_id = session.get('result_id')
+    # The products are only loaded if the index or statistics were evicted
+    context = compare_context(result_id, lambda: result_store.load(result_id)) if result_id else None
+    if not context:
         return render_template('index.html', error='No previous search results found')
     
-    results = session.get('last_results', {})
     query = session.get('last_query', '')
     
     return render_template('compare.html',
                          query=query,
-                         amazon_results=results.get('amazon', []),
-                         daraz_results=results.get('daraz', []),
-                         total_amazon=len(results.get('amazon', [])),
-                         total_daraz=len(results.get('daraz', [])),
-                         timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                         timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                         **context)
 
 @app.route('/compare/<platform1>/<platform2>/<product_id>')
 def compare_products(platform1, platform2, product_id):
     """Compare specific products"""
-    results = session.get('last_results', {})
-    
-    product1 = None
-    product2 = None
+    result_id = session.get('result_id')
+    index = result_indexes.get(result_id, load=lambda: result_store.load(result_id)) if result_id else None
     
-    # Find the products in the results
-    if platform1 in results:
-        for p in results[platform1]:
-            if p.get('asin') == product_id or p.get('id') == product_id:
-                product1 = p
-                break
+    # Resolved through the result set's id map instead of scanning the products
+    product1 = index.lookup(platform1, product_id) if index else None
+    product2 = index.lookup(platform2, product_id) if index else None
     
-    if platform2 in results:
-        for p in results[platform2]:
-            if p.get('asin') == product_id or p.get('id') == product_id:
-                product2 = p
-                break
+    # Ids differ across platforms (ASIN vs DZ<digits>), so fall back to the matched product
+    if product1 and not product2 and platform1 != platform2:
+        matches = product_matches.get(result_id, load=lambda: result_store.load(result_id))
+        counterpart = matches.counterpart(platform1, product_id) if matches else None
+        if counterpart is not None and counterpart.get('platform', '').lower() == platform2:
+            product2 = counterpart
     
     return render_template('compare_detail.html',
                          platform1=platform1,
@@ -366,6 +914,11 @@ def compare_products(platform1, platform2, product_id):
 @app.route('/clear')
 def clear_session():
     """Clear session data"""
+    if session.get('result_id'):
+        result_store.delete(session['result_id'])
+        analytics.discard(session['result_id'])
+        result_indexes.discard(session['result_id'])
+        product_matches.discard(session['result_id'])
     session.clear()
     return render_template('index.html', message='Session cleared successfully')
 
@@ -397,9 +950,21 @@ if __name__ == '__main__':
     print("   POST /search              - Search products")
     print("   GET  /compare              - View last results")
     print("   POST /api/search           - JSON API search")
+    print("   POST /api/search/refresh   - Incremental re-scrape (changes only)")
     print("   POST /api/search/async     - Async JSON API")
     print("   GET  /api/progress/<id>    - Check async progress")
-    print("   GET  /export/<format>      - Export results (json/csv)")
+    print("   GET  /api/results/<id>     - Fetch async search products")
+    print("   GET  /api/results/<id>/query - Filter, sort and page through search products")
+    print("   GET  /api/results/<id>/products/<platform>/<pid>/similar - Similar products")
+    print("   GET  /api/results/<id>/matches - Amazon <-> Daraz product matches")
+    print("   GET  /api/history/<platform>/<asin> - Price history of a product")
+    print("   GET  /api/analytics/<id>   - Price and rating statistics of a search")
+    print("   GET  /api/stream/<id>      - Stream progress and products (SSE/NDJSON)")
+    print("   GET  /api/stats/pool       - HTTP connection reuse")
+    print("   GET  /api/stats/cache      - Result cache stats")
+    print("   GET  /api/stats/queue      - Async job queue stats")
+    print("   GET  /metrics              - Prometheus metrics")
+    print("   GET  /export/<format>      - Export results (csv/json/parquet)")
     print("   GET  /export/summary        - Export summary stats")
     print("   GET  /clear                 - Clear session")
     print("   GET  /health                - Health check")
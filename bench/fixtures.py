@@ -0,0 +1,126 @@
+import json
+import os
+import random
+import re
+from typing import Optional
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+AMAZON_FIXTURE = os.path.join(FIXTURE_DIR, 'amazon_search.html')
+DARAZ_FIXTURE = os.path.join(FIXTURE_DIR, 'daraz_catalog.json')
+
+AMAZON_EMPTY_PAGE = '<html><body><div class="s-no-outline">No results for your search query</div></body></html>'
+DARAZ_EMPTY_PAGE = json.dumps({'mods': {}})
+
+_cache = {}
+
+
+def _read(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+# Where each fixture keeps the product ids the scrapers read
+AMAZON_ID_PATTERN = re.compile(r'data-asin="([A-Za-z0-9]{5,})"')
+DARAZ_ID_PATTERN = re.compile(r'-i(\d+)')
+
+
+def _retag(body: str, id_pattern: re.Pattern, page: int) -> str:
+    """The fixture with every product id made unique to `page`, so pages do not repeat products"""
+    ids = sorted(set(id_pattern.findall(body)), key=len, reverse=True)
+    if not ids:
+        return body
+    # Numeric ids follow letters in URLs (-i<id>), so only digits may not border them
+    border = '0-9' if all(product_id.isdigit() for product_id in ids) else '0-9A-Za-z'
+    occurrence = re.compile(rf'(?<![{border}])(' + '|'.join(map(re.escape, ids)) + rf')(?![{border}])')
+    return occurrence.sub(lambda match: f"{match.group(1)}{page:04d}", body)
+
+
+def _page(platform: str, page: int, load, id_pattern: re.Pattern) -> str:
+    key = (platform, page)
+    if key not in _cache:
+        if platform not in _cache:
+            _cache[platform] = load()
+        _cache[key] = _retag(_cache[platform], id_pattern, page)
+    return _cache[key]
+
+
+def amazon_page(page: int) -> str:
+    """Recorded Amazon search page (see bench/record.py), or a synthetic page of the same shape"""
+    return _page('amazon', page, lambda: _read(AMAZON_FIXTURE) or synthetic_amazon_page(), AMAZON_ID_PATTERN)
+
+
+def daraz_page(page: int) -> str:
+    """Recorded Daraz catalog/?ajax=true response, or a synthetic one of the same shape"""
+    return _page('daraz', page, lambda: _read(DARAZ_FIXTURE) or synthetic_daraz_page(), DARAZ_ID_PATTERN)
+
+
+def synthetic_amazon_page(products: int = 48, padding_kb: int = 800, seed: int = 1) -> str:
+    """
+    Search page with the markup the scraper reads (price whole/fraction, rating,
+    reviews, sponsored label) plus scripts and navigation to reach a real page's size.
+    """
+    rng = random.Random(seed)
+    containers = []
+    for i in range(products):
+        asin = f"B0{seed:02d}{i:06d}"
+        whole = rng.randint(1500, 250000)
+        sponsored = '<span class="puis-label-popover-default"><span class="a-color-secondary">Sponsored</span></span>' if i % 6 == 0 else ''
+        containers.append(f'''
+<div data-asin="{asin}" data-index="{i}" data-component-type="s-search-result" class="s-result-item s-asin sg-col-4-of-24">
+  <div class="sg-col-inner"><div class="s-widget-container s-spacing-small">
+    {sponsored}
+    <span class="rush-component"><a class="a-link-normal s-no-outline" href="/Product-{i}/dp/{asin}/ref=sr_1_{i}">
+      <img class="s-image" src="https://m.media-amazon.com/images/I/{asin}._AC_UY218_.jpg" alt="Product {i}"/></a></span>
+    <div class="a-section a-spacing-none puis-padding-right-small s-title-instructions-style">
+      <h2 class="a-size-mini a-spacing-none a-color-base s-line-clamp-2"><a class="a-link-normal s-underline-text" href="/Product-{i}/dp/{asin}/ref=sr_1_{i}">
+        <span class="a-size-medium a-color-base a-text-normal">Wireless Bluetooth Earbuds Model {i} with Charging Case and Noise Cancelling</span></a></h2>
+    </div>
+    <div class="a-row a-size-small">
+      <span aria-label="4.{i % 10} out of 5 stars"><span class="a-icon-alt">4.{i % 10} out of 5 stars</span></span>
+      <span class="a-size-base s-underline-text">{rng.randint(1, 40)},{rng.randint(100, 999)}</span>
+    </div>
+    <div class="a-row a-size-base a-color-base">
+      <span class="a-price" data-a-size="xl" data-a-color="base"><span class="a-offscreen">PKR {whole:,}.00</span>
+        <span aria-hidden="true"><span class="a-price-symbol">PKR</span><span class="a-price-whole">{whole:,}<span class="a-price-decimal">.</span></span><span class="a-price-fraction">00</span></span></span>
+    </div>
+  </div></div>
+</div>''')
+
+    script = '<script type="text/javascript">P.when("A").execute(function(A){ A.state("s-metadata", {"k": "earbuds"}); });</script>\n'
+    nav = '<div class="nav-item"><a class="nav-link" href="/gp/browse">Browse category</a></div>\n'
+    head_padding = script * (padding_kb * 1024 // 2 // len(script))
+    nav_padding = nav * (padding_kb * 1024 // 2 // len(nav))
+    return (f'<!doctype html><html lang="en-us"><head><title>Amazon.com : earbuds</title>{head_padding}</head>'
+            f'<body><div id="nav-main">{nav_padding}</div><div class="s-main-slot s-result-list">'
+            f'{"".join(containers)}</div></body></html>')
+
+
+def synthetic_daraz_page(products: int = 40, seed: int = 1) -> str:
+    """catalog/?ajax=true response with the fields the scraper reads plus the usual extras"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(products):
+        item_id = 100000000 + seed * 1000 + i
+        price = rng.randint(500, 90000)
+        items.append({
+            'name': f'Wireless Earbuds TWS Model {i} Bluetooth 5.3 with Mic',
+            'nid': str(item_id),
+            'itemId': str(item_id),
+            'itemUrl': f'//www.daraz.pk/products/wireless-earbuds-model-{i}-i{item_id}-s{item_id + 7}.html',
+            'image': f'https://static-01.daraz.pk/p/{item_id}.jpg',
+            'price': str(price),
+            'priceShow': f'Rs. {price:,}',
+            'originalPrice': str(int(price * 1.4)),
+            'discount': '-29%',
+            'ratingScore': f'{rng.uniform(3, 5):.1f}',
+            'review': str(rng.randint(0, 5000)),
+            'location': 'Punjab',
+            'sellerName': f'Seller {i % 7}',
+            'isSponsored': i % 8 == 0,
+            'skus': [{'id': str(item_id + k)} for k in range(3)],
+            'thumbs': [{'image': f'https://static-01.daraz.pk/p/{item_id}-{k}.jpg'} for k in range(4)]
+        })
+    return json.dumps({'mods': {'listItems': items, 'filter': {'filterItems': []}},
+                       'mainInfo': {'totalResults': str(products * 100), 'page': '1'}})
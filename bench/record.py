@@ -0,0 +1,37 @@
+"""
+Record one live Amazon search page and one Daraz catalog response as benchmark fixtures.
+
+    python -m bench.record "wireless earbuds"
+"""
+import os
+import sys
+from config import Config
+from scrapers import get_scraper
+from .fixtures import AMAZON_FIXTURE, DARAZ_FIXTURE, FIXTURE_DIR
+
+
+def record(query: str):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+
+    amazon = get_scraper('amazon')
+    response = amazon.session.get(f"{Config.AMAZON_DOMAIN}/s", params=amazon._page_params(query, 1),
+                                  headers=amazon.get_headers(), timeout=15)
+    save(AMAZON_FIXTURE, response)
+
+    daraz = get_scraper('daraz')
+    response = daraz.session.get(f"{daraz.base_domain}/catalog/", params=daraz._page_params(query, 1),
+                                 headers=daraz.get_headers(), timeout=30)
+    save(DARAZ_FIXTURE, response)
+
+
+def save(path: str, response):
+    if response.status_code != 200:
+        print(f"❌ {response.url} returned {response.status_code}, keeping the existing fixture")
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(response.text)
+    print(f"💾 Saved {len(response.text):,} characters to {path}")
+
+
+if __name__ == '__main__':
+    record(sys.argv[1] if len(sys.argv) > 1 else 'wireless earbuds')
@@ -0,0 +1,334 @@
+"""
+Offline benchmark for the scrapers and the Flask routes.
+
+Replays the fixtures in bench/fixtures (recorded with bench/record.py, or
+synthetic pages of the same shape) through a local stand-in server and reports
+pages/sec, products/sec, p50/p99 page latency, parse time per page and peak RSS.
+Each target runs in a fresh process, so peak RSS is that target's own.
+
+    python -m bench.run --pages 10 --latency 0.05 --error-rate 0.02 --json bench.json
+    python -m bench.run --compare bench.json      # exit code 1 on a regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from config import Config
+from .fixtures import amazon_page
+from .server import StandInServer
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """High-water mark of this (per-target) process, or of its finished parse pool workers if higher, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024  # bytes on macOS, KB on Linux
+    return round(max(peak, children) / divisor, 1)
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """Hide the scrapers' per-page output while measuring"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class PageTimer:
+    """Times every page fetch (wait + request + parse) and every in-process parse of a scraper"""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.latencies = []
+        self.parse_times = []
+
+    def install(self):
+        scraper = self.scraper
+        fetch_page, fetch_page_async, parse_page = scraper.fetch_page, scraper.fetch_page_async, scraper._parse_page
+
+        def timed_fetch(query, page):
+            start = time.perf_counter()
+            try:
+                return fetch_page(query, page)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+        async def timed_fetch_async(query, page):
+            start = time.perf_counter()
+            try:
+                return await fetch_page_async(query, page)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+        def timed_parse(page, body):
+            start = time.perf_counter()
+            try:
+                return parse_page(page, body)
+            finally:
+                self.parse_times.append(time.perf_counter() - start)
+
+        scraper.fetch_page, scraper.fetch_page_async, scraper._parse_page = timed_fetch, timed_fetch_async, timed_parse
+        return self
+
+    def uninstall(self):
+        for name in ('fetch_page', 'fetch_page_async', '_parse_page'):
+            self.scraper.__dict__.pop(name, None)
+
+
+def bench_scraper(platform: str, args) -> Dict:
+    """Full scrapes of one platform against the stand-in server"""
+    from scrapers import get_scraper
+
+    scraper = get_scraper(platform)
+    timer = PageTimer(scraper).install()
+    products = 0
+    start = time.perf_counter()
+    try:
+        with quiet(not args.verbose):
+            for run in range(args.runs):
+                products += len(scraper.search_products(f"bench {platform} {run}", max_pages=args.max_pages))
+    finally:
+        timer.uninstall()
+    elapsed = time.perf_counter() - start
+
+    pages = len(timer.latencies)
+    return {
+        'target': platform,
+        'runs': args.runs,
+        'pages': pages,
+        'products': products,
+        'elapsed': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2),
+        'products_per_sec': round(products / elapsed, 2),
+        'latency_p50_ms': round(percentile(timer.latencies, 50) * 1000, 1),
+        'latency_p99_ms': round(percentile(timer.latencies, 99) * 1000, 1),
+        'parse_ms_per_page': (round(sum(timer.parse_times) / len(timer.parse_times) * 1000, 2)
+                              if timer.parse_times else None),  # None when parsing ran in the parse pool
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def bench_routes(args) -> List[Dict]:
+    """Request latency of the search, results and export routes through the Flask test client"""
+    from app import app
+
+    client = app.test_client()
+    platforms = ['amazon', 'daraz']
+    timings: Dict[str, List[float]] = {}
+    products = 0
+
+    def timed(name, call):
+        start = time.perf_counter()
+        response = call()
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name} returned {response.status_code}")
+        return response
+
+    start = time.perf_counter()
+    with quiet(not args.verbose):
+        for run in range(args.runs):
+            # Unique queries so every search misses the result cache
+            response = timed('POST /api/search', lambda: client.post('/api/search', json={
+                'query': f"bench api {run}", 'platforms': platforms, 'pages': args.max_pages}))
+            products += response.get_json()['total_products']
+
+            form = {'query': f"bench form {run}", 'platforms': platforms, 'pages': args.max_pages or 'all'}
+            timed('POST /search', lambda: client.post('/search', data=form))
+            timed('GET /compare', lambda: client.get('/compare'))
+            timed('GET /export/summary', lambda: client.get('/export/summary'))
+
+            job_start = time.perf_counter()
+            response = timed('POST /api/search/async', lambda: client.post('/api/search/async', json={
+                'query': f"bench async {run}", 'platforms': platforms, 'pages': args.max_pages}))
+            session_id = response.get_json()['session_id']
+            while not client.get(f'/api/progress/{session_id}').get_json().get('all_completed'):
+                time.sleep(0.01)
+            timings.setdefault('async job (queued to done)', []).append(time.perf_counter() - job_start)
+            timed('GET /api/results', lambda: client.get(f'/api/results/{session_id}?limit=500'))
+    elapsed = time.perf_counter() - start
+
+    reports = []
+    for name, values in timings.items():
+        reports.append({
+            'target': name,
+            'runs': len(values),
+            'requests_per_sec': round(len(values) / sum(values), 2),
+            'latency_p50_ms': round(percentile(values, 50) * 1000, 1),
+            'latency_p99_ms': round(percentile(values, 99) * 1000, 1)
+        })
+    reports.append({
+        'target': 'routes (all)',
+        'runs': args.runs,
+        'products': products,
+        'elapsed': round(elapsed, 3),
+        'peak_rss_mb': peak_rss_mb()
+    })
+    return reports
+
+
+def check_parsers(repeat: int = 5) -> Dict:
+    """Amazon parse time per parser backend, and whether they produce identical products"""
+    from scrapers import get_scraper
+
+    scraper = get_scraper('amazon')
+    html = amazon_page(1)
+    report = {'target': 'amazon parser parity'}
+    parsed = {}
+
+    with quiet():
+        for parser in ('html.parser', scraper.html_parser):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                products = scraper.parse_search_results(html, parser)
+            report[f'{parser}_ms'] = round((time.perf_counter() - start) / repeat * 1000, 2)
+            parsed[parser] = [{k: v for k, v in p.items() if k != 'timestamp'} for p in products]
+
+    report['products'] = len(parsed['html.parser'])
+    report['identical'] = parsed['html.parser'] == parsed[scraper.html_parser]
+    return report
+
+
+def compare_reports(current: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Throughput drops or p99 increases beyond the tolerance, per target"""
+    baseline_by_target = {report['target']: report for report in baseline}
+    regressions = []
+    for report in current:
+        before = baseline_by_target.get(report['target'])
+        if not before:
+            continue
+        for key in ('pages_per_sec', 'products_per_sec', 'requests_per_sec'):
+            if before.get(key) and report.get(key) is not None and report[key] < before[key] * (1 - tolerance):
+                regressions.append(f"{report['target']}: {key} {before[key]} -> {report[key]}")
+        if before.get('latency_p99_ms') and report.get('latency_p99_ms') is not None \
+                and report['latency_p99_ms'] > before['latency_p99_ms'] * (1 + tolerance):
+            regressions.append(f"{report['target']}: latency_p99_ms {before['latency_p99_ms']} -> {report['latency_p99_ms']}")
+        if before.get('identical') and not report.get('identical', True):
+            regressions.append(f"{report['target']}: parsers no longer produce identical products")
+    return regressions
+
+
+def print_report(report: Dict):
+    target = report['target']
+    details = ', '.join(f"{key}={value}" for key, value in report.items() if key != 'target')
+    print(f"  {target:<32} {details}")
+
+
+TARGETS = ('amazon', 'daraz', 'routes', 'parsers')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Offline scraper and route benchmark')
+    parser.add_argument('--targets', default='amazon,daraz,routes,parsers',
+                        help='comma separated: amazon, daraz, routes, parsers')
+    parser.add_argument('--pages', type=int, default=10, help='pages with results per query on the stand-in server')
+    parser.add_argument('--max-pages', type=int, default=None, help='max_pages passed to the scrapers (default: all)')
+    parser.add_argument('--runs', type=int, default=3, help='searches per target')
+    parser.add_argument('--latency', type=float, default=0.05, help='server latency per response in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02, help='random +/- added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of responses replaced by an error')
+    parser.add_argument('--error-status', type=int, default=500, help='status code of injected errors')
+    parser.add_argument('--min-delay', type=float, default=0.001, help='rate limiter interval during the run')
+    parser.add_argument('--no-async-engine', action='store_true', help='use the requests/thread path')
+    parser.add_argument('--parse-pool', action='store_true', help='parse pages in the process pool')
+    parser.add_argument('--json', help='write the reports to this file')
+    parser.add_argument('--compare', help='baseline JSON from an earlier --json run')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed regression against the baseline')
+    parser.add_argument('--verbose', action='store_true', help="show the scrapers' output")
+    return parser.parse_args(argv)
+
+
+def run_target(target: str, args, server_url: str) -> List[Dict]:
+    """Run one target; called in a fresh process per target"""
+    # Point everything at the stand-in server before the scrapers and the app are created
+    Config.AMAZON_DOMAIN = server_url
+    Config.MIN_DELAY = args.min_delay
+    Config.RATE_LIMIT_BURST = 1000
+    Config.USE_ASYNC_ENGINE = not args.no_async_engine
+    Config.USE_PARSE_POOL = args.parse_pool
+    Config.CACHE_BACKEND = 'memory'
+    Config.JOB_STORE = 'memory'
+    Config.PRICE_HISTORY_ENABLED = False  # Keep bench scrapes out of the real history store
+
+    from scrapers import get_scraper
+    from scrapers.parse_pool import shutdown_parse_pool
+    get_scraper('daraz').base_domain = server_url
+
+    try:
+        if target in ('amazon', 'daraz'):
+            return [bench_scraper(target, args)]
+        if target == 'routes':
+            return bench_routes(args)
+        return [check_parsers()]
+    finally:
+        # atexit does not run in pool processes, and the parse pool's workers would keep this one alive
+        shutdown_parse_pool(wait=True)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+
+    server = StandInServer(pages=args.pages, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, error_status=args.error_status).start()
+
+    print(f"🏁 Benchmarking {', '.join(targets)} against {server.url} "
+          f"({args.pages} pages, {args.latency * 1000:.0f}ms latency, {args.error_rate:.0%} errors)")
+
+    reports = []
+    context = multiprocessing.get_context('spawn')
+    for target in targets:
+        if target not in TARGETS:
+            print(f"⚠️ Unknown target: {target}")
+            continue
+        # A fresh process per target, so one target's memory does not show up in the next one's peak RSS
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            reports.extend(pool.submit(run_target, target, args, server.url).result())
+    server.stop()
+
+    print(f"📊 Results ({server.counters['requests']} requests served, {server.counters['errors']} errors injected)")
+    for report in reports:
+        print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"💾 Saved to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(reports, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"✅ No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
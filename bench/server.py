@@ -0,0 +1,101 @@
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from .fixtures import AMAZON_EMPTY_PAGE, DARAZ_EMPTY_PAGE, amazon_page, daraz_page
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Scrapers drop connections of speculative page requests they no longer need
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """
+    Local stand-in for Amazon (/s) and Daraz (/catalog/) that replays the fixtures.
+
+    Every response is delayed by `latency` +/- `jitter` seconds, and a share of
+    `error_rate` requests get `error_status` instead. Pages beyond `pages` come
+    back empty, the way the real sites end a result list.
+    """
+
+    def __init__(self, pages: int = 10, latency: float = 0.05, jitter: float = 0.02,
+                 error_rate: float = 0.0, error_status: int = 500, seed: int = 1):
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0}
+        self.httpd = _Server(('127.0.0.1', 0), self._handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='bench-server', daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> 'StandInServer':
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _draw(self):
+        """Delay and failure for the next request"""
+        with self.lock:
+            self.counters['requests'] += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.counters['errors'] += 1
+        return delay, failed
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real sites
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                try:
+                    page = int(parse_qs(url.query).get('page', ['1'])[0])
+                except ValueError:
+                    page = 1
+
+                delay, failed = server._draw()
+                time.sleep(delay)
+
+                if failed:
+                    self._send(server.error_status, 'text/plain', b'injected error')
+                elif url.path == '/s':
+                    body = amazon_page(page) if page <= server.pages else AMAZON_EMPTY_PAGE
+                    self._send(200, 'text/html; charset=utf-8', body.encode())
+                elif url.path.rstrip('/') == '/catalog':
+                    body = daraz_page(page) if page <= server.pages else DARAZ_EMPTY_PAGE
+                    self._send(200, 'application/json', body.encode())
+                else:
+                    self._send(404, 'text/plain', b'not found')
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
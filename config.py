@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     # REMOVED: MAX_PRODUCTS = 10
@@ -18,9 +20,82 @@ class Config:
     
     # Request settings
     REQUEST_TIMEOUT = 30
-    MIN_DELAY = 2  # Minimum delay between requests
-    MAX_DELAY = 5  # Maximum delay between requests
+    MIN_DELAY = 2  # Minimum delay between requests to one site (shared by all scrapes)
+    MAX_DELAY = 5  # Delay a site backs off to on its first 429/503
+    RATE_LIMIT_BURST = 3  # Requests allowed back to back before MIN_DELAY applies
     
     # Performance settings for large scrapes
     CHUNK_SIZE = 100  # Process products in chunks
-    MAX_RETRIES = 3    # Retry failed requests
\ No newline at end of file
+    MAX_RETRIES = 3    # Retry failed requests
+    HTML_PARSER = os.environ.get('HTML_PARSER') or 'lxml'   # BeautifulSoup parser for Amazon pages ('html.parser' if lxml is missing)
+    USE_PARSE_POOL = False     # Parse page bodies in worker processes so parsing uses every core
+    PARSE_WORKERS = None       # Parse pool processes (None = one per CPU core)
+    
+    # Parallel scraping settings
+    FANOUT_WORKERS = 4         # Platforms scraped at the same time
+    PLATFORM_DEADLINE = 600    # Seconds per platform before partial results are returned
+    PAGE_WINDOW = 3            # Page requests kept in flight per platform scrape
+    
+    # Async engine (used when aiohttp is installed)
+    USE_ASYNC_ENGINE = True    # Run scrapes on one shared event loop instead of a thread per job
+    ASYNC_POOL_LIMIT = 100     # Connections open across all scrapes
+    ASYNC_POOL_PER_HOST = 10   # Connections open per site
+    
+    # Shared HTTP connection pools
+    HTTP_POOL_SIZE = 10            # Keep-alive connections kept per site by each scraper session
+    HTTP_KEEPALIVE_TIMEOUT = 60    # Seconds an idle async connection stays open
+    
+    # Local storage
+    DATA_DIR = os.environ.get('DATA_DIR') or os.path.join(basedir, 'data')
+    
+    # Query result cache
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'memory'   # 'memory' or 'sqlite'
+    CACHE_PATH = os.path.join(DATA_DIR, 'cache.sqlite3')
+    CACHE_TTL = 1800                        # Seconds before a cached query is refreshed
+    CACHE_MAX_ENTRIES = 256                 # Memory backend only
+    CACHE_MAX_BYTES = 256 * 1024 * 1024     # Approximate size cap before LRU eviction
+    
+    # Incremental refresh snapshots (stored in the CACHE_BACKEND kind of store)
+    SNAPSHOT_PATH = os.path.join(DATA_DIR, 'snapshots.sqlite3')
+    SNAPSHOT_MAX_ENTRIES = 256              # Memory backend only
+    SNAPSHOT_MAX_BYTES = 256 * 1024 * 1024
+    REFRESH_UNCHANGED_PAGES = 2             # A refresh stops after this many pages in a row match the snapshot
+    
+    # Price history of scraped products
+    PRICE_HISTORY_ENABLED = True
+    PRICE_HISTORY_PATH = os.path.join(DATA_DIR, 'price_history.sqlite3')
+    PRICE_HISTORY_RAW_RETENTION = 30 * 24 * 3600    # Seconds raw observations are kept before being rolled up per day
+    PRICE_HISTORY_RETENTION = 365 * 24 * 3600       # Seconds the daily rollups are kept
+    PRICE_HISTORY_COMPACT_INTERVAL = 3600           # Seconds between rollup/retention passes
+    
+    # Async search job results
+    JOB_STORE = os.environ.get('JOB_STORE') or 'sqlite'   # 'sqlite' or 'memory'
+    JOB_STORE_PATH = os.path.join(DATA_DIR, 'jobs.sqlite3')
+    JOB_RETENTION = 24 * 3600      # Seconds a finished job's products are kept
+    JOB_MAX_JOBS = 500             # Oldest jobs are evicted beyond this
+    RESULT_CACHE_ENTRIES = 16      # /search result sets kept decoded in memory (older ones are read back from the job store)
+    ANALYTICS_CACHE_ENTRIES = 64   # Result sets whose summary statistics are kept in memory
+    PRICE_HISTOGRAM_BINS = 10
+    RESULT_INDEX_ENTRIES = 64      # Result sets whose sort orders for /api/results/<id>/query are kept in memory
+    MATCH_CACHE_ENTRIES = 16       # Result sets whose Amazon <-> Daraz matches are kept in memory
+    MATCH_MIN_SCORE = 0.5          # Title similarity (cosine of character trigram TF-IDF) needed for a match
+    MATCH_TOP_K = 3                # Candidates kept per product before pairs are assigned
+    MATCH_MAX_PRICE_RATIO = 3.0    # Candidates whose PKR prices differ by more than this factor are never matched
+    MATCH_VECTOR_DIM = 1024        # Hashed n-gram features per title
+    MATCH_BATCH_SIZE = 1024        # Products compared per matrix product
+    EXPORT_BATCH_SIZE = 1000       # Products read from the store per chunk of an export download
+    RESULTS_PAGE_SIZE = 50         # Default page size for /api/results
+    RESULTS_MAX_PAGE_SIZE = 500
+    
+    # Async search worker pool
+    JOB_WORKERS = 4                # Async searches running at once
+    JOB_QUEUE_SIZE = 50            # Searches waiting beyond this get 429 + Retry-After
+    PLATFORM_JOB_LIMITS = {        # Running searches allowed per platform
+        'amazon': 2,
+        'daraz': 3,
+    }
+    
+    # Async search progress
+    PROGRESS_TTL = 3600            # Seconds a finished job's progress stays pollable
+    PROGRESS_MAX_JOBS = 10000      # Oldest jobs are dropped beyond this
+    STREAM_HEARTBEAT = 15          # Seconds between keep-alives on /api/stream
@@ -0,0 +1,112 @@
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Strings repeated on every product share one object
+AMAZON = sys.intern('Amazon')
+DARAZ = sys.intern('Daraz')
+PKR = sys.intern('PKR')
+USD = sys.intern('USD')
+
+
+def batch_timestamp() -> str:
+    """One timestamp string for every product parsed from a page"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+@dataclass(slots=True)
+class Product:
+    """
+    One scraped product. Uses slots instead of a per-product dict, but still reads
+    and writes like the product dicts (get, [], in, keys/items) used by the routes,
+    templates and stores. to_dict() gives the plain dict for JSON.
+    """
+    title: str
+    asin: str
+    url: str
+    price: str
+    price_numeric: float
+    currency: str
+    rating: str
+    rating_numeric: float
+    reviews: str
+    image_url: str
+    is_sponsored: bool
+    platform: str
+    timestamp: str
+    old_price: Optional[str] = None           # Daraz only
+    old_price_numeric: Optional[float] = None  # Daraz only
+    page_number: Optional[int] = None
+    extra: Optional[Dict[str, Any]] = None    # Keys set later that are not fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        for name in FIELD_NAMES:
+            value = getattr(self, name)
+            if value is None and name in OPTIONAL_FIELDS:
+                continue
+            data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key: str):
+        if key in FIELD_SET:
+            value = getattr(self, key)
+            if value is None and key in OPTIONAL_FIELDS:
+                raise KeyError(key)
+            return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        if key in FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+
+FIELD_NAMES = tuple(field.name for field in fields(Product) if field.name != 'extra')
+FIELD_SET = frozenset(FIELD_NAMES)
+OPTIONAL_FIELDS = frozenset(('old_price', 'old_price_numeric', 'page_number'))
+
+
+def as_dict(product) -> Dict[str, Any]:
+    """Plain dict of a product that may be a Product or already a dict"""
+    return product.to_dict() if isinstance(product, Product) else product
+
+
+def json_default(value):
+    """`default=` for json.dumps: products become dicts, anything else a string"""
+    if isinstance(value, Product):
+        return value.to_dict()
+    return str(value)
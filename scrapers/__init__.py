@@ -1,4 +1,7 @@
 from .amazon_scraper import AmazonConsoleScraper
 from .daraz_scraper import DarazConsoleScraper
+from .async_engine import AsyncEngine, async_engine_enabled, get_engine
+from .registry import get_scraper, pool_stats
 
-__all__ = ['AmazonConsoleScraper', 'DarazConsoleScraper']
\ No newline at end of file
+__all__ = ['AmazonConsoleScraper', 'DarazConsoleScraper', 'AsyncEngine', 'async_engine_enabled', 'get_engine',
+           'get_scraper', 'pool_stats']
\ No newline at end of file
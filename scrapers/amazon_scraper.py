@@ -1,16 +1,61 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+import soupsieve
 import time
 import random
 import re
-from typing import List, Dict
-from datetime import datetime
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Tuple
+from config import Config
+from models import AMAZON, PKR, Product, batch_timestamp
+from .http_pool import build_session
+from .async_engine import async_engine_enabled, get_engine
+from .page_scheduler import PageScheduler
+from .instrumentation import (DECODE_SECONDS, EXTRACT_SECONDS, FETCH_SECONDS, HTTP_RESPONSES, PARSE_SECONDS,
+                              RETRIES, record_page)
+from .parse_pool import parse_pool_enabled, parse_in_pool, parse_in_pool_async
+from .rate_limiter import get_rate_limiter
+
+# Only the product containers are parsed; the rest of the ~1 MB page is skipped
+SEARCH_RESULT_STRAINER = SoupStrainer('div', attrs={'data-component-type': 's-search-result'})
+RESULT_ITEM_STRAINER = SoupStrainer('div', class_='s-result-item')
+
+# Selectors and patterns are compiled once, they run for every product container
+PRICE_SELECTORS = [
+    (soupsieve.compile('span.a-price span.a-offscreen'), 'offscreen'),
+    (soupsieve.compile('span.a-price[data-a-size="xl"] span.a-offscreen'), 'xl'),
+    (soupsieve.compile('span.a-price[data-a-size="l"] span.a-offscreen'), 'l'),
+    (soupsieve.compile('span.a-price[data-a-size="m"] span.a-offscreen'), 'm'),
+    (soupsieve.compile('span.a-price-whole'), 'whole'),
+]
+PRICE_FRACTION_SELECTOR = soupsieve.compile('span.a-price-fraction')
+REVIEW_SELECTORS = [
+    soupsieve.compile('span.a-size-base.s-underline-text'),
+    soupsieve.compile('span.a-size-base[aria-label]'),
+    soupsieve.compile('span.a-size-base:has(+ span.a-icon-alt)'),
+    soupsieve.compile('span.a-size-base[data-component-type="s-client-side-analytics"]')
+]
+NON_PRICE_CHARS = re.compile(r'[^\d.]')
+PRICE_TEXT_PATTERN = re.compile(r'(?:Rs\.?|PKR)\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', re.I)
+RATING_PATTERN = re.compile(r'(\d+\.?\d*)')
+REVIEW_COUNT_PATTERN = re.compile(r'(\d+(?:,\d+)?(?:\.\d+)?K?)', re.I)
+SPONSORED_PATTERN = re.compile(r'Sponsored|Ad', re.I)
+
+
+def resolve_html_parser(name: str) -> str:
+    """The configured BeautifulSoup parser if it is installed, else the built-in html.parser"""
+    try:
+        BeautifulSoup('', name)
+        return name
+    except FeatureNotFound:
+        print(f"⚠️ HTML parser '{name}' is not installed, falling back to html.parser")
+        return 'html.parser'
 
 class AmazonConsoleScraper:
-    """Amazon product scraper - Fixed for PKR prices"""
+    """Amazon product scraper - Fixed for PKR prices (one instance can be shared across threads)"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = build_session()
+        self.html_parser = resolve_html_parser(Config.HTML_PARSER)
         
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -31,84 +76,202 @@ class AmazonConsoleScraper:
         }
         return headers
     
-    def search_products(self, query: str, max_pages: int = None, progress_callback=None) -> List[Dict]:
-        """Search for products on Amazon"""
+    def search_products(self, query: str, max_pages: int = None, progress_callback=None, deadline: float = None,
+                        page_callback=None, stop_callback=None) -> List[Dict]:
+        """
+        Search for products on Amazon
+        If deadline (a time.time() value) is given, stops there and returns the products found so far
+        page_callback(page, products) is called with each page as soon as it is parsed
+        stop_callback(reason) is called with the scheduler's stop_reason (see iter_pages)
+        """
+        if async_engine_enabled():
+            return get_engine().run(self.search_products_async(query, max_pages, progress_callback, deadline, page_callback,
+                                                                    stop_callback))
+        
         all_products = []
-        base_url = "https://www.amazon.com/s"
+        
+        for page, page_products in self.iter_pages(query, max_pages, deadline, stop_callback):
+            self._collect(all_products, page, page_products, max_pages, progress_callback, page_callback)
+        
+        print(f"✅ Amazon scraping complete! Total products: {len(all_products)}")
+        return all_products
+    
+    async def search_products_async(self, query: str, max_pages: int = None, progress_callback=None, deadline: float = None,
+                                    page_callback=None, stop_callback=None) -> List[Dict]:
+        """search_products on the shared event loop and connection pool"""
+        all_products = []
+        
+        async for page, page_products in self.aiter_pages(query, max_pages, deadline, stop_callback):
+            self._collect(all_products, page, page_products, max_pages, progress_callback, page_callback)
+        
+        print(f"✅ Amazon scraping complete! Total products: {len(all_products)}")
+        return all_products
+    
+    def iter_pages(self, query: str, max_pages: int = None, deadline: float = None,
+                   stop_callback=None) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Yield (page number, products) for each parsed page, in page order
+        Nothing is accumulated, so memory stays flat however many pages are scraped
+        stop_callback(reason) is called with the scheduler's stop_reason once the pages run out
+        """
+        if async_engine_enabled():
+            yield from get_engine().iterate(self.aiter_pages(query, max_pages, deadline, stop_callback))
+            return
         
         print(f"🔍 Searching Amazon for: '{query}'")
         
-        page = 1
-        consecutive_empty_pages = 0
+        scheduler = self._scheduler(self.fetch_page, query, max_pages, deadline)
+        yield from scheduler
+        self._report_stop(scheduler, stop_callback)
+    
+    async def aiter_pages(self, query: str, max_pages: int = None, deadline: float = None,
+                          stop_callback=None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """iter_pages on the shared event loop and connection pool"""
+        print(f"🔍 Searching Amazon for: '{query}'")
         
-        while True:
-            try:
-                params = {
-                    'k': query,
-                    'page': page,
-                    'ref': f'nb_sb_noss_{page}'
-                }
-                
+        scheduler = self._scheduler(self.fetch_page_async, query, max_pages, deadline)
+        async for page, page_products in scheduler:
+            yield page, page_products
+        self._report_stop(scheduler, stop_callback)
+    
+    def _scheduler(self, fetch_page, query: str, max_pages: int, deadline: float) -> PageScheduler:
+        return PageScheduler(
+            lambda page: fetch_page(query, page),
+            max_pages=max_pages,
+            window=Config.PAGE_WINDOW,
+            should_stop=lambda: bool(deadline) and time.time() >= deadline
+        )
+    
+    def _collect(self, all_products: List[Dict], page: int, page_products: List[Dict], max_pages: int,
+                 progress_callback, page_callback):
+        all_products.extend(page_products)
+        print(f"   Found {len(page_products)} products on page {page} (Total: {len(all_products)})")
+        
+        # Hand each parsed page to the caller as soon as it arrives
+        if page_callback:
+            page_callback(page, page_products)
+        
+        # Call progress callback if provided
+        if progress_callback:
+            progress_callback(page, max_pages or 999, len(all_products))
+    
+    def _report_stop(self, scheduler: PageScheduler, stop_callback=None):
+        if scheduler.stop_reason == 'end_of_results':
+            print("✅ No more Amazon products found")
+        elif scheduler.stop_reason == 'stopped':
+            print("⏱️ Amazon deadline reached, returning the products found so far")
+        if stop_callback:
+            stop_callback(scheduler.stop_reason)
+    
+    def _page_params(self, query: str, page: int) -> Dict:
+        return {
+            'k': query,
+            'page': page,
+            'ref': f'nb_sb_noss_{page}'
+        }
+    
+    def _parse_page(self, page: int, html: str) -> List[Product]:
+        with PARSE_SECONDS.time(platform='amazon'):
+            page_products = self.parse_search_results(html)
+            
+            # Add page number to each product
+            for product in page_products:
+                product['page_number'] = page
+        
+        record_page('amazon', page_products)
+        return page_products
+    
+    def fetch_page(self, query: str, page: int) -> Optional[List[Dict]]:
+        """Fetch and parse one search page. Returns None if the page could not be fetched"""
+        url = f"{Config.AMAZON_DOMAIN}/s"
+        limiter = get_rate_limiter()
+        
+        try:
+            for attempt in range(Config.MAX_RETRIES + 1):
                 print(f"📄 Scraping Amazon page {page}...")
-                time.sleep(random.uniform(3, 5))
+                limiter.wait(url)
                 
-                response = self.session.get(
-                    base_url,
-                    params=params,
-                    headers=self.get_headers(),
-                    timeout=15
-                )
+                with FETCH_SECONDS.time(platform='amazon'):
+                    response = self.session.get(
+                        url,
+                        params=self._page_params(query, page),
+                        headers=self.get_headers(),
+                        timeout=15
+                    )
                 
-                if response.status_code == 200:
-                    page_products = self.parse_search_results(response.text)
-                    
-                    if not page_products:
-                        consecutive_empty_pages += 1
-                        if consecutive_empty_pages >= 2:
-                            print(f"✅ No more products found. Total: {len(all_products)}")
-                            break
-                    else:
-                        consecutive_empty_pages = 0
-                        
-                        # Add page number to each product
-                        for product in page_products:
-                            product['page_number'] = page
-                        
-                        all_products.extend(page_products)
-                        print(f"   Found {len(page_products)} products (Total: {len(all_products)})")
-                        
-                        # Call progress callback if provided
-                        if progress_callback:
-                            progress_callback(page, max_pages or 999, len(all_products))
-                    
-                    # Check if we've reached max_pages
-                    if max_pages and page >= max_pages:
-                        break
-                        
-                    page += 1
-                else:
-                    print(f"❌ Failed to fetch page {page}. Status: {response.status_code}")
+                HTTP_RESPONSES.inc(platform='amazon', status=response.status_code)
+                if not limiter.feedback(url, response.status_code, response.headers.get('Retry-After')):
                     break
-                        
-            except Exception as e:
-                print(f"❌ Error scraping page {page}: {str(e)}")
-                break
+                if attempt < Config.MAX_RETRIES:
+                    RETRIES.inc(platform='amazon')
+            
+            if response.status_code != 200:
+                print(f"❌ Failed to fetch page {page}. Status: {response.status_code}")
+                return None
+            
+            if parse_pool_enabled():
+                return parse_in_pool('amazon', page, response.text)
+            return self._parse_page(page, response.text)
+            
+        except Exception as e:
+            HTTP_RESPONSES.inc(platform='amazon', status='error')
+            print(f"❌ Error scraping page {page}: {str(e)}")
+            return None
+    
+    async def fetch_page_async(self, query: str, page: int) -> Optional[List[Dict]]:
+        """fetch_page on the shared event loop; parsing runs in the parse pool or the loop's default executor"""
+        url = f"{Config.AMAZON_DOMAIN}/s"
+        limiter = get_rate_limiter()
         
-        print(f"✅ Amazon scraping complete! Total products: {len(all_products)}")
-        return all_products
+        try:
+            for attempt in range(Config.MAX_RETRIES + 1):
+                print(f"📄 Scraping Amazon page {page}...")
+                await limiter.wait_async(url)
+                
+                with FETCH_SECONDS.time(platform='amazon'):
+                    status, html, headers = await get_engine().fetch(
+                        url,
+                        params=self._page_params(query, page),
+                        headers=self.get_headers(),
+                        timeout=15
+                    )
+                
+                HTTP_RESPONSES.inc(platform='amazon', status=status)
+                if not limiter.feedback(url, status, headers.get('Retry-After')):
+                    break
+                if attempt < Config.MAX_RETRIES:
+                    RETRIES.inc(platform='amazon')
+            
+            if status != 200:
+                print(f"❌ Failed to fetch page {page}. Status: {status}")
+                return None
+            
+            if parse_pool_enabled():
+                return await parse_in_pool_async('amazon', page, html)
+            return await asyncio.get_running_loop().run_in_executor(None, self._parse_page, page, html)
+            
+        except Exception as e:
+            HTTP_RESPONSES.inc(platform='amazon', status='error')
+            print(f"❌ Error scraping page {page}: {str(e)}")
+            return None
     
-    def parse_search_results(self, html: str) -> List[Dict]:
-        """Parse Amazon search results"""
-        soup = BeautifulSoup(html, 'html.parser')
+    def parse_search_results(self, html: str, parser: str = None) -> List[Product]:
+        """Parse Amazon search results (parser defaults to Config.HTML_PARSER)"""
+        parser = parser or self.html_parser
         products = []
+        timestamp = batch_timestamp()
         
         # Find all product containers
-        containers = soup.find_all('div', {'data-component-type': 's-search-result'})
-        
-        if not containers:
-            containers = soup.find_all('div', class_='s-result-item')
+        with DECODE_SECONDS.time(platform='amazon'):
+            soup = BeautifulSoup(html, parser, parse_only=SEARCH_RESULT_STRAINER)
+            containers = soup.find_all('div', {'data-component-type': 's-search-result'})
+            
+            if not containers:
+                soup = BeautifulSoup(html, parser, parse_only=RESULT_ITEM_STRAINER)
+                containers = soup.find_all('div', class_='s-result-item')
         
         for container in containers:
+            extract_start = time.perf_counter()
             try:
                 asin = container.get('data-asin', '')
                 if not asin or len(asin) < 5:
@@ -143,27 +306,29 @@ class AmazonConsoleScraper:
                 # Check if sponsored
                 is_sponsored = self.check_sponsored(container)
                 
-                product = {
-                    'title': title,
-                    'asin': asin,
-                    'url': url,
-                    'price': price_data['display'],
-                    'price_numeric': price_data['numeric'],
-                    'currency': 'PKR',  # Changed to PKR
-                    'rating': f"{rating_numeric} out of 5 stars" if rating_numeric > 0 else "No ratings",
-                    'rating_numeric': rating_numeric,
-                    'reviews': review_count or "0",
-                    'image_url': image_url,
-                    'is_sponsored': is_sponsored,
-                    'platform': 'Amazon',
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
+                product = Product(
+                    title=title,
+                    asin=asin,
+                    url=url,
+                    price=price_data['display'],
+                    price_numeric=price_data['numeric'],
+                    currency=PKR,  # Changed to PKR
+                    rating=f"{rating_numeric} out of 5 stars" if rating_numeric > 0 else "No ratings",
+                    rating_numeric=rating_numeric,
+                    reviews=review_count or "0",
+                    image_url=image_url,
+                    is_sponsored=is_sponsored,
+                    platform=AMAZON,
+                    timestamp=timestamp
+                )
                 
                 products.append(product)
                     
             except Exception as e:
                 print(f"⚠️ Error parsing product: {str(e)}")
                 continue
+            finally:
+                EXTRACT_SECONDS.observe(time.perf_counter() - extract_start, platform='amazon')
         
         return products
     
@@ -171,16 +336,8 @@ class AmazonConsoleScraper:
         """Extract price for PKR (no division)"""
         
         # Try different price selectors
-        price_selectors = [
-            ('span.a-price span.a-offscreen', 'offscreen'),
-            ('span.a-price[data-a-size="xl"] span.a-offscreen', 'xl'),
-            ('span.a-price[data-a-size="l"] span.a-offscreen', 'l'),
-            ('span.a-price[data-a-size="m"] span.a-offscreen', 'm'),
-            ('span.a-price-whole', 'whole'),
-        ]
-        
-        for selector, price_type in price_selectors:
-            price_elem = container.select_one(selector)
+        for selector, price_type in PRICE_SELECTORS:
+            price_elem = selector.select_one(container)
             if price_elem:
                 price_text = price_elem.text.strip()
                 
@@ -191,7 +348,7 @@ class AmazonConsoleScraper:
                         price_text = price_text[:-1]
                     
                     # Check for fraction
-                    fraction_elem = container.select_one('span.a-price-fraction')
+                    fraction_elem = PRICE_FRACTION_SELECTOR.select_one(container)
                     if fraction_elem:
                         fraction = fraction_elem.text.strip()
                         if fraction and fraction != '00':
@@ -200,7 +357,7 @@ class AmazonConsoleScraper:
                         price_text = f"{price_text}.00"
                 
                 # Clean the price
-                cleaned = re.sub(r'[^\d.]', '', price_text)
+                cleaned = NON_PRICE_CHARS.sub('', price_text)
                 
                 # Handle multiple decimal points
                 if cleaned.count('.') > 1:
@@ -226,8 +383,7 @@ class AmazonConsoleScraper:
         
         # Try regex as fallback
         container_text = container.get_text()
-        price_pattern = r'(?:Rs\.?|PKR)\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-        matches = re.findall(price_pattern, container_text, re.I)
+        matches = PRICE_TEXT_PATTERN.findall(container_text)
         
         if matches:
             try:
@@ -257,25 +413,18 @@ class AmazonConsoleScraper:
         if rating_elem:
             rating_text = rating_elem.text.strip()
             try:
-                match = re.search(r'(\d+\.?\d*)', rating_text)
+                match = RATING_PATTERN.search(rating_text)
                 if match:
                     rating = float(match.group(1))
             except:
                 pass
         
         # Find review count
-        review_selectors = [
-            'span.a-size-base.s-underline-text',
-            'span.a-size-base[aria-label]',
-            'span.a-size-base:has(+ span.a-icon-alt)',
-            'span.a-size-base[data-component-type="s-client-side-analytics"]'
-        ]
-        
-        for selector in review_selectors:
-            review_elem = container.select_one(selector)
+        for selector in REVIEW_SELECTORS:
+            review_elem = selector.select_one(container)
             if review_elem:
                 review_text = review_elem.text.strip()
-                match = re.search(r'(\d+(?:,\d+)?(?:\.\d+)?K?)', review_text, re.I)
+                match = REVIEW_COUNT_PATTERN.search(review_text)
                 if match:
                     review_count = match.group(1)
                     break
@@ -284,5 +433,5 @@ class AmazonConsoleScraper:
     
     def check_sponsored(self, container) -> bool:
         """Check if product is sponsored"""
-        sponsored_text = container.find(string=re.compile(r'Sponsored|Ad', re.I))
+        sponsored_text = container.find(string=SPONSORED_PATTERN)
         return bool(sponsored_text)
\ No newline at end of file
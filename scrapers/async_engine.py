@@ -0,0 +1,118 @@
+import asyncio
+import atexit
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+from config import Config
+
+try:
+    import aiohttp
+except ImportError:  # The scrapers fall back to requests.Session
+    aiohttp = None
+
+
+class AsyncEngine:
+    """One event loop and one aiohttp connection pool shared by every scrape job"""
+    
+    def __init__(self, limit: int = 100, limit_per_host: int = 10):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name='scraper-loop', daemon=True)
+        self._session = None
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.thread.start()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    async def get_session(self):
+        """Create the shared ClientSession on first use (it must be created inside the loop)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+        return self._session
+    
+    def _trace_config(self):
+        """Count new vs. reused connections"""
+        async def on_create(session, context, params):
+            self.connections_opened += 1
+        
+        async def on_reuse(session, context, params):
+            self.connections_reused += 1
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_create)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+    
+    def stats(self) -> Dict:
+        """Connections opened vs. reused by the shared pool"""
+        requests_sent = self.connections_opened + self.connections_reused
+        return {
+            'connections_opened': self.connections_opened,
+            'requests': requests_sent,
+            'reused': self.connections_reused,
+            'reuse_ratio': round(self.connections_reused / requests_sent, 3) if requests_sent else 0.0
+        }
+    
+    async def fetch(self, url: str, params: Dict = None, headers: Dict = None, timeout: float = 30) -> Tuple[int, str, Dict]:
+        """GET a URL and return (status code, body text, response headers)"""
+        session = await self.get_session()
+        async with session.get(url, params=params, headers=headers,
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            return response.status, await response.text(errors='replace'), response.headers
+    
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro):
+        """Run a coroutine on the engine loop and block until it finishes"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("AsyncEngine.run() cannot be called from the engine loop; await the coroutine instead")
+        return self.submit(coro).result()
+    
+    def iterate(self, async_iterator) -> Iterator:
+        """Consume an async iterator from sync code, one item per round trip to the loop"""
+        async def step():
+            return await async_iterator.__anext__()
+        
+        async def close():
+            await async_iterator.aclose()
+        
+        try:
+            while True:
+                try:
+                    yield self.run(step())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(close())
+    
+    def close(self):
+        """Close the connection pool and stop the loop"""
+        if self._session is not None and not self._session.closed:
+            self.submit(self._session.close()).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+
+def async_engine_enabled() -> bool:
+    """True if scrapes should run on the shared event loop"""
+    return aiohttp is not None and Config.USE_ASYNC_ENGINE
+
+
+def get_engine() -> AsyncEngine:
+    """Return the process-wide engine, starting it on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncEngine(limit=Config.ASYNC_POOL_LIMIT, limit_per_host=Config.ASYNC_POOL_PER_HOST)
+            atexit.register(_engine.close)
+        return _engine
@@ -1,17 +1,25 @@
-import requests
+import asyncio
 import json
 import time
 import random
 import re
-from typing import List, Dict
-from datetime import datetime
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Tuple
+from config import Config
+from models import DARAZ, PKR, Product, batch_timestamp
+from .http_pool import build_session
+from .async_engine import async_engine_enabled, get_engine
+from .page_scheduler import PageScheduler
+from .instrumentation import (DECODE_SECONDS, EXTRACT_SECONDS, FETCH_SECONDS, HTTP_RESPONSES, PARSE_SECONDS,
+                              RETRIES, record_page)
+from .parse_pool import parse_pool_enabled, parse_in_pool, parse_in_pool_async
+from .rate_limiter import get_rate_limiter
 
 class DarazConsoleScraper:
-    """Daraz API-based scraper - NO LIMIT version"""
+    """Daraz API-based scraper - NO LIMIT version (one instance can be shared across threads)"""
     
     def __init__(self, country="pk"):
         self.base_domain = f"https://www.daraz.{country}"
-        self.session = requests.Session()
+        self.session = build_session()
         # REMOVED: self.max_products = 10
         
         self.user_agents = [
@@ -29,72 +37,185 @@ class DarazConsoleScraper:
             "Connection": "keep-alive"
         }
     
-    def search_products(self, query: str, max_pages: int = None) -> List[Dict]:
+    def search_products(self, query: str, max_pages: int = None, progress_callback=None, deadline: float = None,
+                        page_callback=None, stop_callback=None) -> List[Dict]:
         """
         Search for products on Daraz
         If max_pages is None, scrapes ALL available pages
+        If deadline (a time.time() value) is given, stops there and returns the products found so far
+        page_callback(page, products) is called with each page as soon as it is parsed
+        stop_callback(reason) is called with the scheduler's stop_reason (see iter_pages)
         """
+        if async_engine_enabled():
+            return get_engine().run(self.search_products_async(query, max_pages, progress_callback, deadline, page_callback,
+                                                                    stop_callback))
+        
+        all_products = []
+        
+        for page, page_products in self.iter_pages(query, max_pages, deadline, stop_callback):
+            self._collect(all_products, page, page_products, max_pages, progress_callback, page_callback)
+        
+        print(f"✅ Daraz scraping complete! Total products: {len(all_products)}")
+        return all_products
+    
+    async def search_products_async(self, query: str, max_pages: int = None, progress_callback=None, deadline: float = None,
+                                    page_callback=None, stop_callback=None) -> List[Dict]:
+        """search_products on the shared event loop and connection pool"""
         all_products = []
         
+        async for page, page_products in self.aiter_pages(query, max_pages, deadline, stop_callback):
+            self._collect(all_products, page, page_products, max_pages, progress_callback, page_callback)
+        
+        print(f"✅ Daraz scraping complete! Total products: {len(all_products)}")
+        return all_products
+    
+    def iter_pages(self, query: str, max_pages: int = None, deadline: float = None,
+                   stop_callback=None) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Yield (page number, products) for each parsed page, in page order
+        Nothing is accumulated, so memory stays flat however many pages are scraped
+        stop_callback(reason) is called with the scheduler's stop_reason once the pages run out
+        """
+        if async_engine_enabled():
+            yield from get_engine().iterate(self.aiter_pages(query, max_pages, deadline, stop_callback))
+            return
+        
         print(f"🔍 Searching Daraz for: '{query}'")
         
-        page = 1
-        consecutive_empty_pages = 0
+        scheduler = self._scheduler(self.fetch_page, query, max_pages, deadline)
+        yield from scheduler
+        self._report_stop(scheduler, stop_callback)
+    
+    async def aiter_pages(self, query: str, max_pages: int = None, deadline: float = None,
+                          stop_callback=None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """iter_pages on the shared event loop and connection pool"""
+        print(f"🔍 Searching Daraz for: '{query}'")
         
-        while True:
-            try:
-                url = f"{self.base_domain}/catalog/"
-                
-                params = {
-                    "ajax": "true",
-                    "q": query,
-                    "page": page
-                }
-                
-                headers = self.get_headers()
-                
+        scheduler = self._scheduler(self.fetch_page_async, query, max_pages, deadline)
+        async for page, page_products in scheduler:
+            yield page, page_products
+        self._report_stop(scheduler, stop_callback)
+    
+    def _scheduler(self, fetch_page, query: str, max_pages: int, deadline: float) -> PageScheduler:
+        return PageScheduler(
+            lambda page: fetch_page(query, page),
+            max_pages=max_pages,
+            window=Config.PAGE_WINDOW,
+            should_stop=lambda: bool(deadline) and time.time() >= deadline
+        )
+    
+    def _collect(self, all_products: List[Dict], page: int, page_products: List[Dict], max_pages: int,
+                 progress_callback, page_callback):
+        all_products.extend(page_products)
+        print(f"   Found {len(page_products)} products on page {page} (Total: {len(all_products)})")
+        
+        # Hand each parsed page to the caller as soon as it arrives
+        if page_callback:
+            page_callback(page, page_products)
+        
+        # Call progress callback if provided
+        if progress_callback:
+            progress_callback(page, max_pages or 999, len(all_products))
+    
+    def _report_stop(self, scheduler: PageScheduler, stop_callback=None):
+        if scheduler.stop_reason == 'end_of_results':
+            print("✅ No more Daraz products found")
+        elif scheduler.stop_reason == 'stopped':
+            print("⏱️ Daraz deadline reached, returning the products found so far")
+        if stop_callback:
+            stop_callback(scheduler.stop_reason)
+    
+    def _page_params(self, query: str, page: int) -> Dict:
+        return {
+            "ajax": "true",
+            "q": query,
+            "page": page
+        }
+    
+    def _parse_page(self, page: int, body: str) -> List[Product]:
+        with PARSE_SECONDS.time(platform='daraz'):
+            with DECODE_SECONDS.time(platform='daraz'):
+                items = json.loads(body).get("mods", {}).get("listItems", [])
+            
+            page_products = []
+            timestamp = batch_timestamp()
+            for item in items:
+                with EXTRACT_SECONDS.time(platform='daraz'):
+                    product = self.parse_product(item, timestamp)
+                product['page_number'] = page
+                page_products.append(product)
+        
+        record_page('daraz', page_products)
+        return page_products
+    
+    def fetch_page(self, query: str, page: int) -> Optional[List[Dict]]:
+        """Fetch and parse one catalog page. Returns None if the page could not be fetched"""
+        url = f"{self.base_domain}/catalog/"
+        limiter = get_rate_limiter()
+        
+        try:
+            for attempt in range(Config.MAX_RETRIES + 1):
                 print(f"📄 Scraping Daraz page {page}...")
-                time.sleep(random.uniform(1.5, 3))
+                limiter.wait(url)
                 
-                response = self.session.get(url, params=params, headers=headers, timeout=30)
+                with FETCH_SECONDS.time(platform='daraz'):
+                    response = self.session.get(url, params=self._page_params(query, page),
+                                                headers=self.get_headers(), timeout=30)
                 
-                if response.status_code != 200:
-                    print(f"❌ Failed to fetch page {page}. Status: {response.status_code}")
+                HTTP_RESPONSES.inc(platform='daraz', status=response.status_code)
+                if not limiter.feedback(url, response.status_code, response.headers.get('Retry-After')):
                     break
+                if attempt < Config.MAX_RETRIES:
+                    RETRIES.inc(platform='daraz')
+            
+            if response.status_code != 200:
+                print(f"❌ Failed to fetch page {page}. Status: {response.status_code}")
+                return None
+            
+            if parse_pool_enabled():
+                return parse_in_pool('daraz', page, response.text, {'base_domain': self.base_domain})
+            return self._parse_page(page, response.text)
+            
+        except Exception as e:
+            HTTP_RESPONSES.inc(platform='daraz', status='error')
+            print(f"❌ Error scraping Daraz page {page}: {str(e)}")
+            return None
+    
+    async def fetch_page_async(self, query: str, page: int) -> Optional[List[Dict]]:
+        """fetch_page on the shared event loop"""
+        url = f"{self.base_domain}/catalog/"
+        limiter = get_rate_limiter()
+        
+        try:
+            for attempt in range(Config.MAX_RETRIES + 1):
+                print(f"📄 Scraping Daraz page {page}...")
+                await limiter.wait_async(url)
                 
-                data = response.json()
-                items = data.get("mods", {}).get("listItems", [])
-                
-                if not items:
-                    consecutive_empty_pages += 1
-                    if consecutive_empty_pages >= 2:
-                        print(f"✅ No more products found. Total: {len(all_products)}")
-                        break
-                else:
-                    consecutive_empty_pages = 0
-                    
-                    for item in items:
-                        product = self.parse_product(item)
-                        product['page_number'] = page
-                        all_products.append(product)
-                    
-                    print(f"   Found {len(items)} products (Total: {len(all_products)})")
+                with FETCH_SECONDS.time(platform='daraz'):
+                    status, body, headers = await get_engine().fetch(url, params=self._page_params(query, page),
+                                                                     headers=self.get_headers(), timeout=30)
                 
-                # Check if we've reached max_pages (if specified)
-                if max_pages and page >= max_pages:
+                HTTP_RESPONSES.inc(platform='daraz', status=status)
+                if not limiter.feedback(url, status, headers.get('Retry-After')):
                     break
-                
-                page += 1
-                
-            except Exception as e:
-                print(f"❌ Error scraping Daraz page {page}: {str(e)}")
-                break
-        
-        print(f"✅ Daraz scraping complete! Total products: {len(all_products)}")
-        return all_products
+                if attempt < Config.MAX_RETRIES:
+                    RETRIES.inc(platform='daraz')
+            
+            if status != 200:
+                print(f"❌ Failed to fetch page {page}. Status: {status}")
+                return None
+            
+            if parse_pool_enabled():
+                return await parse_in_pool_async('daraz', page, body, {'base_domain': self.base_domain})
+            return await asyncio.get_running_loop().run_in_executor(None, self._parse_page, page, body)
+            
+        except Exception as e:
+            HTTP_RESPONSES.inc(platform='daraz', status='error')
+            print(f"❌ Error scraping Daraz page {page}: {str(e)}")
+            return None
     
-    def parse_product(self, item: Dict) -> Dict:
-        """Parse individual Daraz product"""
+    def parse_product(self, item: Dict, timestamp: str = None) -> Product:
+        """Parse individual Daraz product (timestamp is shared by the products of one page)"""
         # Generate a product ID from the URL
         item_url = item.get("itemUrl", "")
         product_id_match = re.search(r'-i(\d+)', item_url)
@@ -152,23 +273,23 @@ class DarazConsoleScraper:
         # Check if sponsored
         is_sponsored = item.get("isSponsored", False)
         
-        return {
-            'title': title,
-            'asin': f"DZ{product_id}",
-            'url': self.base_domain + item.get("itemUrl", ""),
-            'price': price_display,
-            'price_numeric': price_numeric,
-            'currency': 'PKR',
-            'old_price': old_price_display,
-            'old_price_numeric': old_price_numeric,
-            'rating': rating,
-            'rating_numeric': rating_numeric,
-            'reviews': reviews_display,
-            'image_url': image_url,
-            'is_sponsored': is_sponsored,
-            'platform': 'Daraz',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        return Product(
+            title=title,
+            asin=f"DZ{product_id}",
+            url=self.base_domain + item.get("itemUrl", ""),
+            price=price_display,
+            price_numeric=price_numeric,
+            currency=PKR,
+            old_price=old_price_display,
+            old_price_numeric=old_price_numeric,
+            rating=rating,
+            rating_numeric=rating_numeric,
+            reviews=reviews_display,
+            image_url=image_url,
+            is_sponsored=is_sponsored,
+            platform=DARAZ,
+            timestamp=timestamp or batch_timestamp()
+        )
     
     def clean_pkr_price(self, price) -> float:
         """Clean PKR price string to float"""
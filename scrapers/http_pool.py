@@ -0,0 +1,59 @@
+import socket
+from typing import Dict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+from config import Config
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets use TCP keep-alive so idle connections survive between searches"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def build_session(pool_size: int = None, max_retries: int = None) -> requests.Session:
+    """
+    Create a long-lived requests.Session with a sized connection pool.
+    Connection errors and 5xx gateway errors are retried by the adapter;
+    429/503 are left to the rate limiter so it can back off.
+    """
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+    retries = Retry(
+        total=Config.MAX_RETRIES if max_retries is None else max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 504),
+        allowed_methods=('GET',),
+        raise_on_status=False
+    )
+    
+    adapter = KeepAliveAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def session_stats(session: requests.Session) -> Dict:
+    """Connections opened vs. requests sent across all of a session's pools"""
+    connections = 0
+    requests_sent = 0
+    
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            requests_sent += pool.num_requests
+    
+    return {
+        'connections_opened': connections,
+        'requests': requests_sent,
+        'reused': max(0, requests_sent - connections),
+        'reuse_ratio': round(1 - connections / requests_sent, 3) if requests_sent else 0.0
+    }
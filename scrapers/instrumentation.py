@@ -0,0 +1,19 @@
+from services.metrics import metrics
+
+# Hot-path timings and counters for both scrapers (exported on /metrics)
+FETCH_SECONDS = metrics.histogram('scraper_fetch_seconds', 'HTTP request time per page attempt', ('platform',))
+DECODE_SECONDS = metrics.histogram('scraper_decode_seconds', 'Time to turn a page body into a tree or JSON', ('platform',))
+PARSE_SECONDS = metrics.histogram('scraper_parse_seconds', 'Time to turn a page body into products', ('platform',))
+EXTRACT_SECONDS = metrics.histogram('scraper_extract_seconds', 'Time to extract one product', ('platform',))
+HTTP_RESPONSES = metrics.counter('scraper_http_responses_total', 'Page responses by status code', ('platform', 'status'))
+RETRIES = metrics.counter('scraper_retries_total', 'Page requests retried after a 429/503', ('platform',))
+EMPTY_PAGES = metrics.counter('scraper_empty_pages_total', 'Pages that returned no products', ('platform',))
+PRODUCTS = metrics.counter('scraper_products_total', 'Products parsed', ('platform',))
+
+
+def record_page(platform: str, products: list):
+    """Count a parsed page"""
+    if products:
+        PRODUCTS.inc(len(products), platform=platform)
+    else:
+        EMPTY_PAGES.inc(platform=platform)
@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Stop reasons of a scrape that got every page it asked for
+COMPLETE_STOP_REASONS = ('max_pages', 'end_of_results')
+
+
+class PageScheduler:
+    """
+    Keep up to `window` page requests in flight and hand the results back in page order.
+
+    fetch_page(page) must return the page's products, an empty list for an empty page,
+    or None when the page could not be fetched (which ends the scrape).
+    Iterate with `for` when fetch_page is a plain function (pages run in a thread pool)
+    and with `async for` when it is a coroutine function (pages run as tasks).
+    """
+
+    def __init__(self, fetch_page: Callable[[int], Optional[List[Dict]]], max_pages: int = None,
+                 window: int = 3, should_stop: Callable[[], bool] = None, max_empty_pages: int = 2):
+        self.fetch_page = fetch_page
+        self.max_pages = max_pages
+        self.window = max(1, window)
+        self.should_stop = should_stop
+        self.max_empty_pages = max_empty_pages
+        # Why iteration ended: 'max_pages', 'end_of_results', 'failed' or 'stopped'
+        self.stop_reason = None
+        self._consecutive_empty_pages = 0
+
+    def _can_issue(self, page: int) -> bool:
+        if self.max_pages and page > self.max_pages:
+            return False
+        if self.should_stop and self.should_stop():
+            self.stop_reason = 'stopped'
+            return False
+        return True
+
+    def _accept(self, products: Optional[List[Dict]]) -> Optional[bool]:
+        """Apply the end-of-results rules to a page: True to yield it, False to skip it, None to stop"""
+        if products is None:
+            self.stop_reason = 'failed'
+            return None
+
+        if not products:
+            self._consecutive_empty_pages += 1
+            if self._consecutive_empty_pages >= self.max_empty_pages:
+                self.stop_reason = 'end_of_results'
+                return None
+            return False
+
+        self._consecutive_empty_pages = 0
+        return True
+
+    def __iter__(self) -> Iterator[Tuple[int, List[Dict]]]:
+        executor = ThreadPoolExecutor(max_workers=self.window, thread_name_prefix='page')
+        pending = {}
+        next_page = 1
+
+        def fill():
+            nonlocal next_page
+            while len(pending) < self.window and self._can_issue(next_page):
+                pending[next_page] = executor.submit(self.fetch_page, next_page)
+                next_page += 1
+
+        try:
+            fill()
+            page = 1
+
+            while page in pending:
+                products = pending.pop(page).result()
+
+                accepted = self._accept(products)
+                if accepted is None:
+                    return
+                if accepted:
+                    yield page, products
+
+                page += 1
+                fill()
+
+            if self.stop_reason is None:
+                self.stop_reason = 'max_pages'
+        finally:
+            # Pages requested past the end of results are discarded
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        pending = {}
+        next_page = 1
+
+        def fill():
+            nonlocal next_page
+            while len(pending) < self.window and self._can_issue(next_page):
+                pending[next_page] = asyncio.ensure_future(self.fetch_page(next_page))
+                next_page += 1
+
+        try:
+            fill()
+            page = 1
+
+            while page in pending:
+                products = await pending.pop(page)
+
+                accepted = self._accept(products)
+                if accepted is None:
+                    return
+                if accepted:
+                    yield page, products
+
+                page += 1
+                fill()
+
+            if self.stop_reason is None:
+                self.stop_reason = 'max_pages'
+        finally:
+            for task in pending.values():
+                task.cancel()
@@ -0,0 +1,143 @@
+import asyncio
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+# Scrapers built inside each worker process, one per platform
+_worker_scrapers = {}
+
+
+def _parse_in_worker(platform: str, page: int, body: str, settings: Dict) -> List[Dict]:
+    """Runs in a pool process: parse one raw page body into product dicts"""
+    from .registry import SCRAPER_CLASSES  # Imported here to avoid a cycle with the scraper modules
+
+    scraper = _worker_scrapers.get(platform)
+    if scraper is None:
+        scraper = _worker_scrapers[platform] = SCRAPER_CLASSES[platform]()
+    for name, value in settings.items():
+        setattr(scraper, name, value)
+    return scraper._parse_page(page, body)
+
+
+def _parse_batch_in_worker(items: List[Tuple]) -> List[Tuple[bool, object]]:
+    """Runs in a pool process: parse several pages, giving (True, products) or (False, error) for each"""
+    results = []
+    for platform, page, body, settings in items:
+        try:
+            results.append((True, _parse_in_worker(platform, page, body, settings)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class PageBatcher:
+    """
+    Hands pages to the pool with at most one task in flight per worker. Pages that
+    arrive while every worker is busy (e.g. the rest of a scheduler window) wait here
+    and go out together, one task per idle worker, so each round trip carries several
+    pages. A page that finds a worker idle is sent right away.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, workers: int):
+        self.pool = pool
+        self.workers = workers
+        self.pending = []
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def submit(self, platform: str, page: int, body: str, settings: Dict) -> Future:
+        future = Future()
+        with self.lock:
+            self.pending.append(((platform, page, body, settings), future))
+            batches = self._take_batches()
+        self._send(batches)
+        return future
+
+    def _take_batches(self) -> List[List]:
+        """Split the pending pages over the idle workers (called with the lock held)"""
+        if self.in_flight >= self.workers:
+            return []
+        # Drop pages whose caller gave up (e.g. a cancelled speculative fetch); the rest can't be cancelled now
+        self.pending = [entry for entry in self.pending if entry[1].set_running_or_notify_cancel()]
+        idle = min(self.workers - self.in_flight, len(self.pending))
+        if idle <= 0:
+            return []
+        batches = [self.pending[i::idle] for i in range(idle)]
+        self.pending = []
+        self.in_flight += idle
+        return batches
+
+    def _send(self, batches: List[List]):
+        for batch in batches:
+            try:
+                task = self.pool.submit(_parse_batch_in_worker, [item for item, _ in batch])
+            except RuntimeError as e:  # The pool was shut down
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            task.add_done_callback(lambda task, batch=batch: self._done(task, batch))
+
+    def _done(self, task: Future, batch: List):
+        with self.lock:
+            self.in_flight -= 1
+            batches = self._take_batches()
+        self._send(batches)
+
+        try:
+            results = task.result()
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_batcher: Optional[PageBatcher] = None
+_pool_lock = threading.Lock()
+
+
+def parse_pool_enabled() -> bool:
+    """True if page bodies should be parsed in the process pool"""
+    return Config.USE_PARSE_POOL
+
+
+def get_parse_batcher() -> PageBatcher:
+    """Return the batcher of the process-wide parse pool, starting the pool on first use"""
+    global _pool, _batcher
+    with _pool_lock:
+        if _pool is None:
+            workers = Config.PARSE_WORKERS or os.cpu_count() or 1
+            # Forking a process with live threads (event loop, worker pool, locks) can deadlock the child
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _batcher = PageBatcher(_pool, workers)
+            atexit.register(shutdown_parse_pool)
+        return _batcher
+
+
+def shutdown_parse_pool(wait: bool = False):
+    """Stop the parse pool's workers; runs at exit, but multiprocessing children have to call it themselves"""
+    global _pool, _batcher
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = _batcher = None
+
+
+def parse_in_pool(platform: str, page: int, body: str, settings: Dict = None) -> List[Dict]:
+    """Parse a whole page body in a pool process (batched with other pending pages) and wait for the products"""
+    return get_parse_batcher().submit(platform, page, body, settings or {}).result()
+
+
+async def parse_in_pool_async(platform: str, page: int, body: str, settings: Dict = None) -> List[Dict]:
+    """parse_in_pool without blocking the event loop"""
+    return await asyncio.wrap_future(get_parse_batcher().submit(platform, page, body, settings or {}))
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from config import Config
+
+# Status codes that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+class DomainRateLimiter:
+    """
+    Token bucket per domain, shared by every scrape job in the process.
+
+    Each domain starts at one request every `min_delay` seconds (with up to `burst`
+    requests allowed back to back). A 429/503 multiplies the interval by
+    `backoff_factor`, capped at `max_backoff`; every successful response shrinks it
+    by `recovery_factor` until it is back at `min_delay`.
+    """
+
+    def __init__(self, min_delay: float, max_delay: float, burst: int = 1,
+                 backoff_factor: float = 2.0, recovery_factor: float = 0.9, max_backoff: float = 60):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.burst = max(1, burst)
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.max_backoff = max(max_backoff, max_delay)
+        self.lock = threading.Lock()
+        self.domains: Dict[str, Dict] = {}
+
+    def _state(self, domain: str) -> Dict:
+        if domain not in self.domains:
+            self.domains[domain] = {
+                'interval': self.min_delay,
+                'tokens': float(self.burst),
+                'updated': time.monotonic()
+            }
+        return self.domains[domain]
+
+    def reserve(self, url: str) -> float:
+        """Take a request slot for the URL's domain and return how long to wait before using it"""
+        domain = urlparse(url).netloc
+        with self.lock:
+            state = self._state(domain)
+            now = time.monotonic()
+            elapsed = now - state['updated']
+            state['tokens'] = min(self.burst, state['tokens'] + elapsed / state['interval'])
+            state['updated'] = now
+            state['tokens'] -= 1
+            # A negative balance is a queue of reservations, each one interval apart
+            return max(0.0, -state['tokens'] * state['interval'])
+
+    def wait(self, url: str):
+        """Block until a request to the URL's domain is allowed"""
+        delay = self.reserve(url)
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str):
+        """wait() for coroutines"""
+        delay = self.reserve(url)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def feedback(self, url: str, status_code: int, retry_after: Optional[str] = None) -> bool:
+        """
+        Report a response status. Returns True if the domain is throttling us
+        (the caller should retry the request after waiting again).
+        """
+        domain = urlparse(url).netloc
+        with self.lock:
+            state = self._state(domain)
+
+            if status_code in THROTTLE_STATUSES:
+                state['interval'] = min(self.max_backoff, max(self.max_delay, state['interval'] * self.backoff_factor))
+                pause = state['interval']
+                if retry_after and str(retry_after).isdigit():
+                    pause = max(pause, int(retry_after))
+                # Push every pending reservation back by the pause
+                state['tokens'] = min(state['tokens'], 0.0) - pause / state['interval']
+                print(f"⚠️ {domain} returned {status_code}, backing off to one request every {state['interval']:.1f}s")
+                return True
+
+            if status_code < 400 and state['interval'] > self.min_delay:
+                state['interval'] = max(self.min_delay, state['interval'] * self.recovery_factor)
+            return False
+
+
+_rate_limiter: Optional[DomainRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Return the process-wide rate limiter"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = DomainRateLimiter(Config.MIN_DELAY, Config.MAX_DELAY, burst=Config.RATE_LIMIT_BURST)
+        return _rate_limiter
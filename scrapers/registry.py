@@ -0,0 +1,33 @@
+import threading
+from typing import Dict, Optional
+from .amazon_scraper import AmazonConsoleScraper
+from .daraz_scraper import DarazConsoleScraper
+from .async_engine import async_engine_enabled, get_engine
+from .http_pool import session_stats
+
+SCRAPER_CLASSES = {
+    'amazon': AmazonConsoleScraper,
+    'daraz': DarazConsoleScraper,
+}
+
+_scrapers = {}
+_scrapers_lock = threading.Lock()
+
+
+def get_scraper(platform: str):
+    """Return the long-lived scraper for a platform (shared by all routes and jobs)"""
+    if platform not in SCRAPER_CLASSES:
+        return None
+    
+    with _scrapers_lock:
+        if platform not in _scrapers:
+            _scrapers[platform] = SCRAPER_CLASSES[platform]()
+        return _scrapers[platform]
+
+
+def pool_stats() -> Dict[str, Optional[Dict]]:
+    """Connection reuse for every shared scraper session and the async engine pool"""
+    with _scrapers_lock:
+        stats = {platform: session_stats(scraper.session) for platform, scraper in _scrapers.items()}
+    stats['async_engine'] = get_engine().stats() if async_engine_enabled() else None
+    return stats
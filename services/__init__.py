@@ -0,0 +1,21 @@
+from .fanout import ParallelScraper, format_elapsed
+from .cache import ResultCache, CacheBackend, MemoryCacheBackend, SQLiteCacheBackend, create_cache_backend
+from .single_flight import SingleFlight
+from .job_store import JobStore, MemoryJobStore, SQLiteJobStore, create_job_store
+from .result_store import ResultStore
+from .job_queue import JobScheduler, QueueFull
+from .progress import ProgressRegistry
+from .metrics import MetricsRegistry, metrics
+from .analytics import AnalyticsCache, build_frame, summarize, summarize_results
+from .result_index import ResultIndex, ResultIndexCache, SORT_OPTIONS
+from .matching import MatchCache, ProductMatches, match_products
+from .snapshots import SnapshotStore, diff_products, page_hash
+from .price_history import PriceHistoryStore
+
+__all__ = ['ParallelScraper', 'format_elapsed', 'ResultCache', 'CacheBackend', 'MemoryCacheBackend',
+           'SQLiteCacheBackend', 'create_cache_backend', 'SingleFlight', 'JobStore', 'MemoryJobStore',
+           'SQLiteJobStore', 'create_job_store', 'ResultStore',
+           'JobScheduler', 'QueueFull', 'ProgressRegistry', 'MetricsRegistry', 'metrics',
+           'AnalyticsCache', 'build_frame', 'summarize', 'summarize_results', 'ResultIndex', 'ResultIndexCache',
+           'SORT_OPTIONS', 'MatchCache', 'ProductMatches', 'match_products',
+           'SnapshotStore', 'diff_products', 'page_hash', 'PriceHistoryStore']
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+PRICE_PERCENTILES = (25, 50, 75, 90)
+
+
+def build_frame(products: List) -> pd.DataFrame:
+    """The numeric columns of a platform's products, one row per product"""
+    count = len(products)
+    return pd.DataFrame({
+        'price': np.fromiter((p.get('price_numeric') or 0 for p in products), dtype=float, count=count),
+        'rating': np.fromiter((p.get('rating_numeric') or 0 for p in products), dtype=float, count=count),
+        'old_price': np.fromiter((p.get('old_price_numeric') or 0 for p in products), dtype=float, count=count),
+        'sponsored': np.fromiter((bool(p.get('is_sponsored')) for p in products), dtype=bool, count=count)
+    })
+
+
+def summarize(frame: pd.DataFrame, histogram_bins: int = 10) -> Dict:
+    """Price, rating, sponsored and discount statistics of one platform's frame (vectorized)"""
+    count = len(frame)
+    price = frame['price'].to_numpy()
+    rating = frame['rating'].to_numpy()
+    old_price = frame['old_price'].to_numpy()
+
+    priced = price[price > 0]
+    rated = rating[rating > 0]
+    sponsored = int(frame['sponsored'].sum())
+
+    summary = {
+        'count': count,
+        'avg_price': float(priced.mean()) if priced.size else 0,
+        'min_price': float(priced.min()) if priced.size else 0,
+        'max_price': float(priced.max()) if priced.size else 0,
+        'avg_rating': float(rated.mean()) if rated.size else 0,
+        'sponsored_count': sponsored,
+        'sponsored_percentage': (sponsored / count * 100) if count else 0
+    }
+
+    percentiles = np.percentile(priced, PRICE_PERCENTILES) if priced.size else [0] * len(PRICE_PERCENTILES)
+    summary['price_percentiles'] = {f"p{pct}": float(value) for pct, value in zip(PRICE_PERCENTILES, percentiles)}
+
+    # Products per whole star (1-5); unrated products are counted separately
+    stars = np.bincount(np.clip(np.floor(rated).astype(int), 1, 5), minlength=6)[1:] if rated.size else [0] * 5
+    summary['rating_distribution'] = {str(star): int(n) for star, n in zip(range(1, 6), stars)}
+    summary['unrated_count'] = int(count - rated.size)
+
+    # Discount against the old price (Daraz lists one)
+    discounted = (old_price > price) & (price > 0)
+    discounts = (old_price[discounted] - price[discounted]) / old_price[discounted] * 100
+    summary['discounted_count'] = int(discounted.sum())
+    summary['avg_discount_percentage'] = float(discounts.mean()) if discounts.size else 0
+    summary['max_discount_percentage'] = float(discounts.max()) if discounts.size else 0
+
+    if priced.size:
+        counts, edges = np.histogram(priced, bins=histogram_bins)
+        summary['price_histogram'] = {'edges': [float(edge) for edge in edges], 'counts': [int(n) for n in counts]}
+    else:
+        summary['price_histogram'] = {'edges': [], 'counts': []}
+
+    return summary
+
+
+def summarize_results(results: Dict[str, List], histogram_bins: int = 10) -> Dict[str, Dict]:
+    """summarize() for every platform that has products"""
+    return {platform: summarize(build_frame(products), histogram_bins)
+            for platform, products in results.items() if products}
+
+
+class AnalyticsCache:
+    """
+    Summary statistics per result set, computed once when the result set is
+    complete and then served from memory (LRU of `max_entries`).
+    """
+
+    def __init__(self, max_entries: int = 64, histogram_bins: int = 10):
+        self.max_entries = max_entries
+        self.histogram_bins = histogram_bins
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def compute(self, result_id: str, results: Dict[str, List]) -> Dict[str, Dict]:
+        """Compute and cache the summaries of a finished result set"""
+        summaries = summarize_results(results, self.histogram_bins)
+
+        with self.lock:
+            self.entries[result_id] = summaries
+            self.entries.move_to_end(result_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return summaries
+
+    def get(self, result_id: str, load: Callable[[], Optional[Dict[str, List]]] = None) -> Optional[Dict[str, Dict]]:
+        """Cached summaries; on a miss, load() the result set (None if it is gone) and compute them"""
+        with self.lock:
+            summaries = self.entries.get(result_id)
+            if summaries is not None:
+                self.entries.move_to_end(result_id)
+                return summaries
+
+        results = load() if load else None
+        if results is None:
+            return None
+        return self.compute(result_id, results)
+
+    def discard(self, result_id: str):
+        with self.lock:
+            self.entries.pop(result_id, None)
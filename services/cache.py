@@ -0,0 +1,241 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from models import json_default
+from .metrics import metrics
+
+CACHE_REQUESTS = metrics.counter('result_cache_total', 'Result cache lookups and refreshes by outcome', ('platform', 'result'))
+
+
+def estimate_size(value) -> int:
+    """Approximate size of a cached value in bytes (its JSON length)"""
+    return len(json.dumps(value, default=json_default))
+
+
+class CacheBackend:
+    """Storage used by ResultCache. Entries are (value, stored_at) pairs"""
+
+    def get(self, key: str) -> Optional[Tuple[List[Dict], float]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: List[Dict], stored_at: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU bounded by entry count and approximate bytes"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            value, stored_at, size = entry
+            return list(value), stored_at
+
+    def set(self, key, value, stored_at):
+        size = estimate_size(value)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[2]
+            self.entries[key] = (value, stored_at, size)
+            self.total_bytes += size
+
+            # Evict least recently used entries
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def delete(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[2]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.total_bytes}
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk LRU that survives restarts, bounded by approximate bytes"""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_accessed ON result_cache (accessed_at)')
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute('SELECT value, stored_at FROM result_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE result_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        data = json.dumps(value, default=json_default)
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO result_cache (key, value, stored_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)',
+                (key, data, stored_at, time.time(), len(data))
+            )
+
+            # Evict least recently used entries until under the size cap
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM result_cache').fetchone()[0]
+            while total > self.max_bytes:
+                row = self.conn.execute('SELECT key, size FROM result_cache ORDER BY accessed_at LIMIT 1').fetchone()
+                if row is None:
+                    break
+                self.conn.execute('DELETE FROM result_cache WHERE key = ?', (row[0],))
+                total -= row[1]
+            self.conn.commit()
+
+    def delete(self, key):
+        with self.lock:
+            self.conn.execute('DELETE FROM result_cache WHERE key = ?', (key,))
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM result_cache')
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache').fetchone()
+        return {'entries': entries, 'bytes': size}
+
+
+def create_cache_backend(name: str, path: str = None, max_entries: int = 256,
+                         max_bytes: int = 256 * 1024 * 1024) -> CacheBackend:
+    """Build a cache backend by name ('memory' or 'sqlite')"""
+    if name == 'sqlite':
+        return SQLiteCacheBackend(path, max_bytes=max_bytes)
+    if name == 'memory':
+        return MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes)
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+class ResultCache:
+    """
+    Scrape results keyed by (platform, normalized query, pages).
+
+    Fresh entries are returned directly. Expired entries are still returned,
+    while a background refresh re-scrapes the query and replaces them.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 1800, refresh_workers: int = 2):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='cache-refresh')
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0}
+
+    @staticmethod
+    def make_key(platform: str, query: str, pages: Optional[int]) -> str:
+        normalized = ' '.join(query.lower().split())
+        return f"{platform}|{normalized}|{pages or 'all'}"
+
+    def _count(self, name: str, platform: str):
+        with self.lock:
+            self.counters[name] += 1
+        CACHE_REQUESTS.inc(platform=platform, result=name)
+
+    def get_or_scrape(self, platform: str, query: str, pages: Optional[int],
+                      scrape_fn: Callable[[], List[Dict]], refresh_fn: Callable[[], List[Dict]] = None,
+                      cacheable: Callable[[List[Dict]], bool] = None) -> List[Dict]:
+        """
+        Return cached products for the query, or call scrape_fn() and cache its result.
+        refresh_fn (default scrape_fn) re-scrapes expired entries in the background.
+        `cacheable(products)` can veto storing a result (e.g. a partial scrape), fresh or refreshed.
+        """
+        key = self.make_key(platform, query, pages)
+        entry = self.backend.get(key)
+
+        if entry is not None:
+            products, stored_at = entry
+            if time.time() - stored_at < self.ttl:
+                self._count('hits', platform)
+            else:
+                self._count('stale_hits', platform)
+                self._refresh(key, refresh_fn or scrape_fn, cacheable)
+            return products
+
+        self._count('misses', platform)
+        products = scrape_fn()
+        if products and (cacheable is None or cacheable(products)):
+            self.backend.set(key, products, time.time())
+        return products
+
+    def _refresh(self, key: str, scrape_fn: Callable[[], List[Dict]], cacheable: Callable[[List[Dict]], bool] = None):
+        """Re-scrape an expired key in the background (once per key at a time)"""
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def refresh():
+            try:
+                products = scrape_fn()
+                if products and (cacheable is None or cacheable(products)):
+                    self.backend.set(key, products, time.time())
+                    self._count('refreshes', key.split('|', 1)[0])
+            except Exception as e:
+                print(f"⚠️ Cache refresh failed for {key}: {str(e)}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        self.refresh_executor.submit(refresh)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            stats = dict(self.counters)
+            stats['refreshing'] = len(self.refreshing)
+        stats.update(self.backend.stats())
+        stats['ttl'] = self.ttl
+        return stats
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, List
+from models import FIELD_NAMES, as_dict, json_default
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is unavailable without pyarrow
+    pyarrow = None
+
+# Columns of every export, in this order (keys set later on products are left out)
+EXPORT_COLUMNS = list(FIELD_NAMES)
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'json': ('application/json', 'json'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+def csv_chunks(batches: Iterable[List]) -> Iterator[str]:
+    """CSV text, one chunk per batch of products"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(as_dict(product) for product in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def json_chunks(batches: Iterable[List], meta: Dict) -> Iterator[str]:
+    """A JSON object with the metadata and a "products" array, one chunk per batch of products"""
+    head = json.dumps(meta, default=json_default)
+    yield head[:-1] + (', ' if meta else '') + '"products": ['
+
+    first = True
+    for batch in batches:
+        rows = ', '.join(json.dumps(as_dict(product), default=json_default) for product in batch)
+        if rows:
+            yield rows if first else ', ' + rows
+            first = False
+    yield ']}'
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain()"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_schema():
+    types = {'price_numeric': pyarrow.float64(), 'rating_numeric': pyarrow.float64(),
+             'old_price_numeric': pyarrow.float64(), 'is_sponsored': pyarrow.bool_(), 'page_number': pyarrow.int64()}
+    return pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in EXPORT_COLUMNS])
+
+
+def parquet_chunks(batches: Iterable[List]) -> Iterator[bytes]:
+    """Parquet file bytes, one row group per batch of products (needs pyarrow)"""
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            rows = [{column: as_dict(product).get(column) for column in EXPORT_COLUMNS} for product in batch]
+            writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
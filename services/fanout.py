@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ParallelScraper:
+    """Run one query against several platforms at the same time"""
+
+    def __init__(self, max_workers: int = 4, grace_period: float = 30):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fanout')
+        # Extra time a scraper gets after its deadline to finish the page in flight
+        self.grace_period = grace_period
+
+    def run(self, scrape_fn: Callable, platforms: List[str], query: str,
+            pages: Optional[int] = None, deadline: Optional[float] = None) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict]]:
+        """
+        Call scrape_fn(platform, query, pages, deadline=...) for every platform in parallel.
+        `deadline` is the per-platform budget in seconds; scrapers stop at it and
+        return whatever they collected so far.
+        Returns (results, status) keyed by platform.
+        """
+        started = time.time()
+        platform_deadline = started + deadline if deadline else None
+
+        def timed(platform):
+            products = scrape_fn(platform, query, pages, deadline=platform_deadline)
+            return products, time.time() - started
+
+        futures = {}
+        for platform in platforms:
+            futures[platform] = self.executor.submit(timed, platform)
+
+        timeout = deadline + self.grace_period if deadline else None
+        wait(futures.values(), timeout=timeout)
+
+        results = {}
+        status = {}
+        for platform, future in futures.items():
+            if not future.done():
+                elapsed = time.time() - started
+                # The scraper is stuck in a request; it will stop on its own at the deadline
+                print(f"⏱️ {platform} did not finish within {deadline}s, returning no results")
+                results[platform] = []
+                status[platform] = {'status': 'timeout', 'elapsed': elapsed}
+                continue
+
+            try:
+                products, elapsed = future.result()
+            except Exception as e:
+                elapsed = time.time() - started
+                print(f"❌ {platform} scrape failed: {str(e)}")
+                results[platform] = []
+                status[platform] = {'status': 'error', 'elapsed': elapsed, 'message': str(e)}
+                continue
+
+            results[platform] = products
+            status[platform] = {
+                'status': 'partial' if deadline and elapsed >= deadline else 'completed',
+                'elapsed': elapsed
+            }
+
+        return results, status
+
+
+def format_elapsed(seconds: float) -> str:
+    """Format seconds as '<m>m <s>s'"""
+    return f"{int(seconds // 60)}m {int(seconds % 60)}s"
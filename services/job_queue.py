@@ -0,0 +1,171 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+
+class QueueFull(Exception):
+    """Raised by JobScheduler.submit when the queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    Fixed pool of worker threads pulling jobs from a bounded priority queue.
+
+    Jobs with a higher priority run first (FIFO within a priority). A job lists the
+    platforms it scrapes; it only starts when every one of them is below its
+    concurrency limit, so a busy platform does not block jobs for the other one.
+
+    A job that returns a concurrent.futures.Future (e.g. a coroutine submitted to the
+    async engine) keeps its slot until the future resolves, but gives its worker
+    thread back right away. At most `workers` jobs run at once either way.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 50, platform_limits: Dict[str, int] = None,
+                 keep_finished: int = 1000):
+        self.max_queue = max_queue
+        self.platform_limits = platform_limits or {}
+        self.keep_finished = keep_finished
+        self.condition = threading.Condition()
+        self.queue = []  # heap of (-priority, sequence, job_id)
+        self.sequence = itertools.count()
+        self.jobs: Dict[str, Dict] = {}
+        self.finished = OrderedDict()
+        self.running_per_platform: Dict[str, int] = {}
+        self.running = 0
+        self.avg_duration = 60.0  # Moving average used for Retry-After estimates
+
+        self.workers = [
+            threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True) for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, job_id: str, fn: Callable[[], None], priority: int = 0, platforms: List[str] = ()):
+        """Queue a job or raise QueueFull; fn may return a Future to finish the job later"""
+        with self.condition:
+            if len(self.queue) >= self.max_queue:
+                raise QueueFull(self.retry_after())
+
+            self.jobs[job_id] = {
+                'fn': fn,
+                'priority': priority,
+                'platforms': list(platforms),
+                'state': 'queued',
+                'queued_at': time.time(),
+                'started_at': None
+            }
+            heapq.heappush(self.queue, (-priority, next(self.sequence), job_id))
+            self.condition.notify()
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up (one running job finishing)"""
+        return max(1, int(self.avg_duration / max(1, len(self.workers)) + 0.5))
+
+    def _runnable(self, job: Dict) -> bool:
+        for platform in job['platforms']:
+            limit = self.platform_limits.get(platform)
+            if limit is not None and self.running_per_platform.get(platform, 0) >= limit:
+                return False
+        return True
+
+    def _next_job(self) -> Optional[str]:
+        """Highest-priority queued job whose platforms have capacity (caller holds the lock)"""
+        if self.running >= len(self.workers):
+            return None
+        for entry in sorted(self.queue):
+            job_id = entry[2]
+            if self._runnable(self.jobs[job_id]):
+                self.queue.remove(entry)
+                heapq.heapify(self.queue)
+                return job_id
+        return None
+
+    def _work(self):
+        while True:
+            with self.condition:
+                job_id = self._next_job()
+                while job_id is None:
+                    self.condition.wait()
+                    job_id = self._next_job()
+
+                job = self.jobs[job_id]
+                job['state'] = 'running'
+                job['started_at'] = time.time()
+                self.running += 1
+                for platform in job['platforms']:
+                    self.running_per_platform[platform] = self.running_per_platform.get(platform, 0) + 1
+
+            try:
+                result = job['fn']()
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {str(e)}")
+                result = None
+
+            if isinstance(result, Future):
+                result.add_done_callback(lambda future, job_id=job_id, job=job: self._finish_future(job_id, job, future))
+            else:
+                self._finish(job_id, job)
+
+    def _finish_future(self, job_id: str, job: Dict, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"❌ Job {job_id} failed: {str(future.exception())}")
+        self._finish(job_id, job)
+
+    def _finish(self, job_id: str, job: Dict):
+        with self.condition:
+            duration = time.time() - job['started_at']
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * duration
+            self.running -= 1
+            for platform in job['platforms']:
+                self.running_per_platform[platform] -= 1
+
+            self.jobs.pop(job_id, None)
+            self.finished[job_id] = {
+                'state': 'done',
+                'wait_time': round(job['started_at'] - job['queued_at'], 3),
+                'run_time': round(duration, 3)
+            }
+            while len(self.finished) > self.keep_finished:
+                self.finished.popitem(last=False)
+
+            # A job or platform slot was freed, so a skipped job may be runnable now
+            self.condition.notify_all()
+
+    def job_info(self, job_id: str) -> Optional[Dict]:
+        """Queue state, position, depth and wait time of a job"""
+        with self.condition:
+            depth = len(self.queue)
+            if job_id in self.finished:
+                return dict(self.finished[job_id], queue_depth=depth)
+
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+
+            info = {'state': job['state'], 'priority': job['priority'], 'queue_depth': depth}
+            if job['state'] == 'queued':
+                ordered = [entry[2] for entry in sorted(self.queue)]
+                info['position'] = ordered.index(job_id) + 1
+                info['wait_time'] = round(time.time() - job['queued_at'], 3)
+            else:
+                info['wait_time'] = round(job['started_at'] - job['queued_at'], 3)
+            return info
+
+    def stats(self) -> Dict:
+        with self.condition:
+            return {
+                'workers': len(self.workers),
+                'running': self.running,
+                'queue_depth': len(self.queue),
+                'max_queue': self.max_queue,
+                'running_per_platform': dict(self.running_per_platform),
+                'avg_job_seconds': round(self.avg_duration, 3)
+            }
@@ -0,0 +1,287 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from models import json_default
+
+
+def project(product: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested fields of a product (all fields if none requested)"""
+    if not fields:
+        return product
+    return {field: product.get(field) for field in fields}
+
+
+class JobStore:
+    """Where async search jobs and their products are kept"""
+
+    def create_job(self, session_id: str, query: str, platforms: List[str]):
+        raise NotImplementedError
+
+    def save_results(self, session_id: str, platform: str, products: List[Dict]):
+        raise NotImplementedError
+
+    def finish_job(self, session_id: str, status: str = 'completed'):
+        raise NotImplementedError
+
+    def get_job(self, session_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def get_products(self, session_id: str, platform: str = None, offset: int = 0,
+                     limit: int = 50, fields: List[str] = None) -> Tuple[List[Dict], int]:
+        """One page of a job's products and the total count"""
+        raise NotImplementedError
+
+    def get_all_products(self, session_id: str) -> Dict[str, List[Dict]]:
+        """Every product of a job, grouped by platform"""
+        raise NotImplementedError
+
+    def iter_products(self, session_id: str, platform: str = None, batch_size: int = 500) -> Iterator[List[Dict]]:
+        """A job's products in batches, without loading them all at once"""
+        raise NotImplementedError
+
+    def delete_job(self, session_id: str):
+        raise NotImplementedError
+
+    def evict(self) -> int:
+        """Apply the retention policy; returns the number of jobs removed"""
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """In-process job store (results are lost on restart)"""
+
+    def __init__(self, max_age: float = 86400, max_jobs: int = 500):
+        self.max_age = max_age
+        self.max_jobs = max_jobs
+        self.jobs: Dict[str, Dict] = {}
+        self.products: Dict[str, Dict[str, List[Dict]]] = {}
+        self.lock = threading.Lock()
+
+    def create_job(self, session_id, query, platforms):
+        with self.lock:
+            self.jobs[session_id] = {
+                'session_id': session_id,
+                'query': query,
+                'platforms': list(platforms),
+                'status': 'in_progress',
+                'created_at': time.time(),
+                'finished_at': None,
+                'counts': {}
+            }
+            self.products[session_id] = {}
+        self.evict()
+
+    def save_results(self, session_id, platform, products):
+        with self.lock:
+            if session_id not in self.jobs:
+                return
+            self.products[session_id][platform] = list(products)
+            self.jobs[session_id]['counts'][platform] = len(products)
+
+    def finish_job(self, session_id, status='completed'):
+        with self.lock:
+            if session_id in self.jobs:
+                self.jobs[session_id]['status'] = status
+                self.jobs[session_id]['finished_at'] = time.time()
+
+    def get_job(self, session_id):
+        with self.lock:
+            job = self.jobs.get(session_id)
+            return dict(job, counts=dict(job['counts'])) if job else None
+
+    def get_products(self, session_id, platform=None, offset=0, limit=50, fields=None):
+        with self.lock:
+            by_platform = self.products.get(session_id, {})
+            if platform:
+                rows = by_platform.get(platform, [])
+            else:
+                rows = [p for name in sorted(by_platform) for p in by_platform[name]]
+        return [project(p, fields) for p in rows[offset:offset + limit]], len(rows)
+
+    def get_all_products(self, session_id):
+        with self.lock:
+            return {platform: list(products) for platform, products in self.products.get(session_id, {}).items()}
+
+    def iter_products(self, session_id, platform=None, batch_size=500):
+        with self.lock:
+            by_platform = dict(self.products.get(session_id, {}))
+        for name in sorted(by_platform):
+            if platform and name != platform:
+                continue
+            products = by_platform[name]
+            for start in range(0, len(products), batch_size):
+                yield products[start:start + batch_size]
+
+    def delete_job(self, session_id):
+        with self.lock:
+            self.jobs.pop(session_id, None)
+            self.products.pop(session_id, None)
+
+    def evict(self):
+        cutoff = time.time() - self.max_age
+        with self.lock:
+            by_age = sorted(self.jobs.values(), key=lambda job: job['created_at'])
+            expired = [job['session_id'] for job in by_age if job['created_at'] < cutoff]
+            overflow = [job['session_id'] for job in by_age[:max(0, len(by_age) - self.max_jobs)]]
+            removed = set(expired) | set(overflow)
+            for session_id in removed:
+                self.jobs.pop(session_id, None)
+                self.products.pop(session_id, None)
+        return len(removed)
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite file; products are stored one JSON row each so they can be paged"""
+
+    def __init__(self, path: str, max_age: float = 86400, max_jobs: int = 500):
+        self.path = path
+        self.max_age = max_age
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                session_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                platforms TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+            CREATE TABLE IF NOT EXISTS job_products (
+                session_id TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (session_id, platform, position)
+            );
+        ''')
+        self.conn.commit()
+
+    def create_job(self, session_id, query, platforms):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs (session_id, query, platforms, status, created_at) VALUES (?, ?, ?, ?, ?)',
+                (session_id, query, json.dumps(list(platforms)), 'in_progress', time.time())
+            )
+            self.conn.commit()
+        self.evict()
+
+    def save_results(self, session_id, platform, products):
+        rows = [(session_id, platform, position, json.dumps(product, default=json_default))
+                for position, product in enumerate(products)]
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM job_products WHERE session_id = ? AND platform = ?', (session_id, platform))
+                self.conn.executemany(
+                    'INSERT INTO job_products (session_id, platform, position, data) VALUES (?, ?, ?, ?)', rows
+                )
+
+    def finish_job(self, session_id, status='completed'):
+        with self.lock:
+            self.conn.execute('UPDATE jobs SET status = ?, finished_at = ? WHERE session_id = ?',
+                              (status, time.time(), session_id))
+            self.conn.commit()
+
+    def get_job(self, session_id):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT query, platforms, status, created_at, finished_at FROM jobs WHERE session_id = ?', (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self.conn.execute(
+                'SELECT platform, COUNT(*) FROM job_products WHERE session_id = ? GROUP BY platform', (session_id,)
+            ).fetchall())
+
+        return {
+            'session_id': session_id,
+            'query': row[0],
+            'platforms': json.loads(row[1]),
+            'status': row[2],
+            'created_at': row[3],
+            'finished_at': row[4],
+            'counts': counts
+        }
+
+    def get_products(self, session_id, platform=None, offset=0, limit=50, fields=None):
+        if platform:
+            where, params = 'session_id = ? AND platform = ?', (session_id, platform)
+        else:
+            where, params = 'session_id = ?', (session_id,)
+
+        with self.lock:
+            total = self.conn.execute(f'SELECT COUNT(*) FROM job_products WHERE {where}', params).fetchone()[0]
+            rows = self.conn.execute(
+                f'SELECT data FROM job_products WHERE {where} ORDER BY platform, position LIMIT ? OFFSET ?',
+                params + (limit, offset)
+            ).fetchall()
+
+        return [project(json.loads(row[0]), fields) for row in rows], total
+
+    def get_all_products(self, session_id):
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT platform, data FROM job_products WHERE session_id = ? ORDER BY platform, position', (session_id,)
+            ).fetchall()
+
+        results = {}
+        for platform, data in rows:
+            results.setdefault(platform, []).append(json.loads(data))
+        return results
+
+    def iter_products(self, session_id, platform=None, batch_size=500):
+        # Keyset pagination: each batch starts after the last (platform, position) seen
+        last = ('', -1)
+        while True:
+            if platform:
+                where, params = 'session_id = ? AND platform = ? AND position > ?', (session_id, platform, last[1])
+            else:
+                where, params = 'session_id = ? AND (platform, position) > (?, ?)', (session_id,) + last
+            with self.lock:
+                rows = self.conn.execute(
+                    f'SELECT platform, position, data FROM job_products WHERE {where} '
+                    f'ORDER BY platform, position LIMIT ?', params + (batch_size,)
+                ).fetchall()
+            if not rows:
+                return
+            yield [json.loads(row[2]) for row in rows]
+            last = (rows[-1][0], rows[-1][1])
+
+    def delete_job(self, session_id):
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM job_products WHERE session_id = ?', (session_id,))
+                self.conn.execute('DELETE FROM jobs WHERE session_id = ?', (session_id,))
+
+    def evict(self):
+        cutoff = time.time() - self.max_age
+        with self.lock:
+            expired = [row[0] for row in self.conn.execute(
+                'SELECT session_id FROM jobs WHERE created_at < ?', (cutoff,)
+            )]
+            overflow = [row[0] for row in self.conn.execute(
+                'SELECT session_id FROM jobs ORDER BY created_at DESC LIMIT -1 OFFSET ?', (self.max_jobs,)
+            )]
+            removed = set(expired) | set(overflow)
+            if removed:
+                with self.conn:
+                    self.conn.executemany('DELETE FROM job_products WHERE session_id = ?', [(s,) for s in removed])
+                    self.conn.executemany('DELETE FROM jobs WHERE session_id = ?', [(s,) for s in removed])
+        return len(removed)
+
+
+def create_job_store(name: str, path: str = None, max_age: float = 86400, max_jobs: int = 500) -> JobStore:
+    """Build a job store by name ('sqlite' or 'memory')"""
+    if name == 'sqlite':
+        return SQLiteJobStore(path, max_age=max_age, max_jobs=max_jobs)
+    if name == 'memory':
+        return MemoryJobStore(max_age=max_age, max_jobs=max_jobs)
+    raise ValueError(f"Unknown job store: {name}")
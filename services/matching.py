@@ -0,0 +1,165 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .result_index import tokenize
+
+
+def title_ngrams(title: str, n: int = 3) -> List[str]:
+    """Character n-grams of a normalized title (words are padded, so word starts and ends count)"""
+    text = f" {' '.join(tokenize(title))} "
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def _ngram_counts(titles: List[str], dim: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct row * dim + hashed n-gram keys of the titles, and how often each occurs"""
+    # crc32 rather than hash(), which is salted per process, so every worker matches alike
+    keys = [row * dim + zlib.crc32(gram.encode()) % dim
+            for row, title in enumerate(titles) for gram in title_ngrams(title, n)]
+    return np.unique(np.array(keys, dtype=np.int64), return_counts=True)
+
+
+def tfidf_vectors(left_titles: List[str], right_titles: List[str], dim: int = 1024,
+                  n: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unit-length TF-IDF vectors of hashed character n-grams for two lists of titles,
+    with document frequencies taken over both (float32, one row per title)
+    """
+    left_keys, left_counts = _ngram_counts(left_titles, dim, n)
+    right_keys, right_counts = _ngram_counts(right_titles, dim, n)
+
+    documents = len(left_titles) + len(right_titles)
+    df = np.bincount(left_keys % dim, minlength=dim) + np.bincount(right_keys % dim, minlength=dim)
+    idf = (np.log((documents + 1) / (df + 1)) + 1).astype(np.float32)
+
+    vectors = []
+    for titles, keys, counts in ((left_titles, left_keys, left_counts), (right_titles, right_keys, right_counts)):
+        matrix = np.zeros((len(titles), dim), dtype=np.float32)
+        matrix.flat[keys] = (1 + np.log(counts)) * idf[keys % dim]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        vectors.append(matrix / np.maximum(norms, 1e-12))
+    return vectors[0], vectors[1]
+
+
+def _log_prices(products: List) -> np.ndarray:
+    # Both scrapers parse PKR amounts; the USD label app.set_currency gives Amazon products is display only
+    prices = np.array([p.get('price_numeric') or 0 for p in products], dtype=np.float32)
+    return np.log(np.where(prices > 0, prices, np.nan))
+
+
+def match_products(left: List, right: List, top_k: int = 3, min_score: float = 0.5,
+                   max_price_ratio: float = 3.0, dim: int = 1024, batch_size: int = 1024) -> List[Tuple[int, int, float]]:
+    """
+    Pair products of two platforms by title similarity, at most one partner each.
+
+    Similarities are computed a batch of `left` rows at a time (one matrix product
+    per batch). Candidates whose prices differ by more than `max_price_ratio`
+    are blocked, the `top_k` best of each row above `min_score` are kept, and
+    pairs are then taken greedily from the highest score down.
+    Returns (left position, right position, score) tuples.
+    """
+    if not left or not right:
+        return []
+
+    left_vectors, right_vectors = tfidf_vectors([p.get('title') or '' for p in left],
+                                                [p.get('title') or '' for p in right], dim)
+    # Log prices, NaN when unknown (comparisons with NaN are false, so those are never blocked)
+    left_prices = _log_prices(left)
+    right_prices = _log_prices(right)
+    max_log_ratio = np.log(max_price_ratio) if max_price_ratio else None
+    k = min(top_k, len(right))
+
+    rows, columns, scores = [], [], []
+    for start in range(0, len(left), batch_size):
+        batch = left_vectors[start:start + batch_size] @ right_vectors.T
+
+        if max_log_ratio is not None:
+            batch[np.abs(left_prices[start:start + batch_size, None] - right_prices[None, :]) > max_log_ratio] = 0
+
+        top = np.argpartition(-batch, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(batch, top, axis=1)
+        keep_rows, keep_columns = np.nonzero(top_scores >= min_score)
+        rows.append(keep_rows + start)
+        columns.append(top[keep_rows, keep_columns])
+        scores.append(top_scores[keep_rows, keep_columns])
+
+    rows, columns, scores = np.concatenate(rows), np.concatenate(columns), np.concatenate(scores)
+    pairs = []
+    used_left, used_right = set(), set()
+    for i in np.argsort(-scores, kind='stable'):
+        row, column = int(rows[i]), int(columns[i])
+        if row not in used_left and column not in used_right:
+            used_left.add(row)
+            used_right.add(column)
+            pairs.append((row, column, float(scores[i])))
+    return pairs
+
+
+class ProductMatches:
+    """Cross-platform pairs of one result set, best first, with a lookup by either product's id"""
+
+    def __init__(self, results: Dict[str, List], left: str = 'amazon', right: str = 'daraz', **options):
+        self.left = left
+        self.right = right
+        left_products = results.get(left) or []
+        right_products = results.get(right) or []
+
+        self.pairs = []
+        self.counterparts = {}
+        for row, column, score in match_products(left_products, right_products, **options):
+            left_product, right_product = left_products[row], right_products[column]
+            left_price = left_product.get('price_numeric') or 0
+            right_price = right_product.get('price_numeric') or 0
+            self.pairs.append({
+                left: left_product,
+                right: right_product,
+                'score': round(score, 4),
+                'price_ratio': round(left_price / right_price, 4) if left_price > 0 and right_price > 0 else None
+            })
+            self.counterparts[(left, left_product.get('asin'))] = right_product
+            self.counterparts[(right, right_product.get('asin'))] = left_product
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def counterpart(self, platform: str, product_id: str):
+        """The product matched to this one on the other platform, or None"""
+        return self.counterparts.get((platform, product_id))
+
+
+class MatchCache:
+    """ProductMatches per result set, computed on first use (LRU of `max_entries`)"""
+
+    def __init__(self, max_entries: int = 16, **options):
+        self.max_entries = max_entries
+        self.options = options
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def compute(self, results: Dict[str, List]) -> ProductMatches:
+        return ProductMatches(results, **self.options)
+
+    def get(self, result_id: str, load: Callable[[], Optional[Dict[str, List]]] = None) -> Optional[ProductMatches]:
+        """Cached matches; on a miss, load() the result set (None if it is gone) and match it"""
+        with self.lock:
+            matches = self.entries.get(result_id)
+            if matches is not None:
+                self.entries.move_to_end(result_id)
+                return matches
+
+        results = load() if load else None
+        if results is None:
+            return None
+
+        matches = self.compute(results)
+        with self.lock:
+            self.entries[result_id] = matches
+            self.entries.move_to_end(result_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return matches
+
+    def discard(self, result_id: str):
+        with self.lock:
+            self.entries.pop(result_id, None)
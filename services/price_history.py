@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .metrics import metrics
+
+HISTORY_WRITES = metrics.counter('price_history_observations_total', 'Price observations written to the history store',
+                                 ('platform',))
+
+DAY = 86400
+
+
+def parse_timestamp(value) -> Optional[int]:
+    """Epoch seconds of a product timestamp ('%Y-%m-%d %H:%M:%S' string or a number)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.strptime(value, '%Y-%m-%d %H:%M:%S').timestamp())
+    except ValueError:
+        return None
+
+
+def format_timestamp(value: int) -> str:
+    return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class PriceHistoryStore:
+    """
+    Price and rating observations per (platform, asin) in a SQLite file.
+
+    Each scrape is written in one transaction. Observations are clustered by series
+    and time (WITHOUT ROWID tables), so a product's history is one index range scan.
+    Raw observations older than `raw_retention` are rolled up into one row per (UTC)
+    day, and daily rows older than `retention` are dropped.
+    """
+
+    def __init__(self, path: str, raw_retention: float = 30 * DAY, retention: float = 365 * DAY,
+                 compact_interval: float = 3600):
+        self.path = path
+        self.raw_retention = raw_retention
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self.last_compacted = 0.0
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='price-history')
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS price_series (
+                series_id INTEGER PRIMARY KEY,
+                platform TEXT NOT NULL,
+                asin TEXT NOT NULL,
+                title TEXT,
+                UNIQUE (platform, asin)
+            );
+            CREATE TABLE IF NOT EXISTS price_points (
+                series_id INTEGER NOT NULL,
+                observed_at INTEGER NOT NULL,
+                price REAL,
+                old_price REAL,
+                rating REAL,
+                PRIMARY KEY (series_id, observed_at)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_price_points_observed ON price_points (observed_at);
+            CREATE TABLE IF NOT EXISTS price_daily (
+                series_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                min_price REAL,
+                max_price REAL,
+                avg_price REAL,
+                last_price REAL,
+                avg_rating REAL,
+                samples INTEGER NOT NULL,
+                PRIMARY KEY (series_id, day)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_price_daily_day ON price_daily (day);
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def _rows(platform: str, products: List) -> List[Tuple]:
+        """(platform, asin, title, observed_at, price, old_price, rating) per product with an asin"""
+        now = int(time.time())
+        parsed = {}  # Products of a page share one timestamp string
+        rows = []
+        for product in products:
+            asin = product.get('asin')
+            if not asin:
+                continue
+            stamp = product.get('timestamp')
+            if stamp not in parsed:
+                parsed[stamp] = parse_timestamp(stamp) or now
+            rows.append((platform, asin, product.get('title'), parsed[stamp], product.get('price_numeric') or None,
+                         product.get('old_price_numeric') or None, product.get('rating_numeric') or None))
+        return rows
+
+    def record(self, platform: str, products: List) -> int:
+        """Write one scrape's observations in a single transaction; returns how many were written"""
+        return self._write(platform, self._rows(platform, products))
+
+    def record_in_background(self, platform: str, products: List):
+        """record() on the writer thread (the rows are taken from the products right away)"""
+        rows = self._rows(platform, products)
+
+        def write():
+            try:
+                self._write(platform, rows)
+            except Exception as e:
+                print(f"⚠️ Could not record price history for {platform}: {str(e)}")
+
+        self.writer.submit(write)
+
+    def _write(self, platform: str, rows: List[Tuple]) -> int:
+        if not rows:
+            return 0
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO price_series (platform, asin, title) VALUES (?, ?, ?) '
+                    'ON CONFLICT (platform, asin) DO UPDATE SET title = excluded.title',
+                    [(row[0], row[1], row[2]) for row in rows]
+                )
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO price_points (series_id, observed_at, price, old_price, rating) '
+                    'VALUES ((SELECT series_id FROM price_series WHERE platform = ? AND asin = ?), ?, ?, ?, ?)',
+                    [(row[0], row[1], row[3], row[4], row[5], row[6]) for row in rows]
+                )
+        HISTORY_WRITES.inc(len(rows), platform=platform)
+
+        if time.time() - self.last_compacted >= self.compact_interval:
+            self.compact()
+        return len(rows)
+
+    def compact(self, now: float = None) -> Dict:
+        """Roll raw observations past raw_retention up into daily rows, and drop daily rows past retention"""
+        now = now or time.time()
+        raw_cutoff = int(now - self.raw_retention)
+        # Only whole days are rolled up, so a day is never split between raw and daily rows
+        raw_cutoff -= raw_cutoff % DAY
+        cutoff = int(now - self.retention)
+
+        with self.lock:
+            with self.conn:
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO price_daily
+                        (series_id, day, min_price, max_price, avg_price, last_price, avg_rating, samples)
+                    SELECT days.series_id, days.day, days.min_price, days.max_price, days.avg_price,
+                           (SELECT price FROM price_points
+                            WHERE series_id = days.series_id AND observed_at >= days.day AND observed_at < days.day + 86400
+                            ORDER BY observed_at DESC LIMIT 1),
+                           days.avg_rating, days.samples
+                    FROM (
+                        SELECT series_id, observed_at - observed_at % 86400 AS day, MIN(price) AS min_price,
+                               MAX(price) AS max_price, AVG(price) AS avg_price, AVG(rating) AS avg_rating,
+                               COUNT(*) AS samples
+                        FROM price_points WHERE observed_at < ? GROUP BY series_id, day
+                    ) AS days
+                ''', (raw_cutoff,))
+                rolled_up = self.conn.execute('DELETE FROM price_points WHERE observed_at < ?', (raw_cutoff,)).rowcount
+                expired = self.conn.execute('DELETE FROM price_daily WHERE day < ?', (cutoff,)).rowcount
+                self.conn.execute('''
+                    DELETE FROM price_series WHERE NOT EXISTS (
+                        SELECT 1 FROM price_points WHERE price_points.series_id = price_series.series_id
+                    ) AND NOT EXISTS (
+                        SELECT 1 FROM price_daily WHERE price_daily.series_id = price_series.series_id
+                    )
+                ''')
+            self.last_compacted = time.time()
+        return {'rolled_up': rolled_up, 'expired': expired}
+
+    def history(self, platform: str, asin: str, start: float = None, end: float = None,
+                resolution: int = None) -> Optional[Dict]:
+        """
+        Observations of one product between start and end (epoch seconds), or None if it
+        was never recorded. With `resolution` (seconds) raw observations are bucketed.
+        Older, rolled-up history is returned per day.
+        """
+        start = int(start) if start is not None else 0
+        end = int(end) if end is not None else 2 ** 62
+
+        with self.lock:
+            series = self.conn.execute('SELECT series_id, title FROM price_series WHERE platform = ? AND asin = ?',
+                                       (platform, asin)).fetchone()
+            if series is None:
+                return None
+            series_id, title = series
+
+            if resolution:
+                points = self.conn.execute('''
+                    SELECT observed_at - observed_at % ? AS bucket, MIN(price), MAX(price), AVG(price),
+                           AVG(old_price), AVG(rating), COUNT(*)
+                    FROM price_points WHERE series_id = ? AND observed_at BETWEEN ? AND ?
+                    GROUP BY bucket ORDER BY bucket
+                ''', (resolution, series_id, start, end)).fetchall()
+            else:
+                points = self.conn.execute('''
+                    SELECT observed_at, price, old_price, rating FROM price_points
+                    WHERE series_id = ? AND observed_at BETWEEN ? AND ? ORDER BY observed_at
+                ''', (series_id, start, end)).fetchall()
+
+            daily = self.conn.execute('''
+                SELECT day, min_price, max_price, avg_price, last_price, avg_rating, samples FROM price_daily
+                WHERE series_id = ? AND day BETWEEN ? AND ? ORDER BY day
+            ''', (series_id, start - start % DAY, end)).fetchall()
+
+        if resolution:
+            points = [{'timestamp': format_timestamp(bucket), 'min_price': low, 'max_price': high, 'avg_price': avg,
+                       'avg_old_price': old_price, 'avg_rating': rating, 'samples': samples}
+                      for bucket, low, high, avg, old_price, rating, samples in points]
+        else:
+            points = [{'timestamp': format_timestamp(observed_at), 'price': price, 'old_price': old_price,
+                       'rating': rating}
+                      for observed_at, price, old_price, rating in points]
+
+        return {
+            'platform': platform,
+            'asin': asin,
+            'title': title,
+            'points': points,
+            'daily': [{'date': time.strftime('%Y-%m-%d', time.gmtime(day)), 'min_price': low, 'max_price': high,
+                       'avg_price': avg, 'last_price': last, 'avg_rating': rating, 'samples': samples}
+                      for day, low, high, avg, last, rating, samples in daily]
+        }
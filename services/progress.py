@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+DONE_STATUSES = ('completed', 'error')
+
+
+class ProgressRegistry:
+    """
+    Scraping progress indexed by job id, with one entry per platform.
+
+    Lookups are O(1). Jobs whose platforms are all done are evicted `ttl` seconds
+    after they finish; beyond `max_jobs` the oldest jobs are dropped regardless.
+    Every update is also published to the job's subscribers (see subscribe()).
+    """
+
+    def __init__(self, ttl: float = 3600, max_jobs: int = 10000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.lock = threading.RLock()
+        self.jobs: 'OrderedDict[str, Dict[str, Dict]]' = OrderedDict()  # creation order
+        self.finished: 'OrderedDict[str, float]' = OrderedDict()        # finish order
+        self.subscribers: Dict[str, List[queue.Queue]] = {}
+        self.followers: Dict[str, set] = {}  # job id -> jobs sharing its entries
+
+    def _entry(self, job_id: str, platform: str) -> Optional[Dict]:
+        return self.jobs.get(job_id, {}).get(platform)
+
+    def create(self, job_id: str, platform: str, status: str = 'queued', message: str = ''):
+        """Add a platform entry to a job (existing entries are left alone)"""
+        with self.lock:
+            platforms = self.jobs.setdefault(job_id, {})
+            platforms.setdefault(platform, {
+                'platform': platform,
+                'status': status,
+                'current_page': 0,
+                'total_pages': 0,
+                'products_found': 0,
+                'message': message
+            })
+            self._evict()
+
+    def set(self, job_id: str, platform: str, **fields):
+        """Update fields of a platform entry"""
+        with self.lock:
+            entry = self._entry(job_id, platform)
+            if entry is None:
+                return
+            entry.update(fields)
+            if fields.get('status') in DONE_STATUSES:
+                self._check_finished(job_id)
+            self.publish(job_id, 'progress', dict(entry))
+
+    def share(self, job_id: str, platform: str, leader_job_id: str, leader_platform: str) -> bool:
+        """
+        Make a platform entry the same object as another job's entry (coalesced scrapes).
+        Returns False if there was no leader entry to share.
+        """
+        with self.lock:
+            leader = self._entry(leader_job_id, leader_platform) if leader_job_id is not None else None
+            if leader is None or job_id not in self.jobs:
+                return False
+            self.jobs[job_id][platform] = leader
+            self.followers.setdefault(leader_job_id, set()).add(job_id)
+            return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Dict]]:
+        """Copy of a job's platform entries, or None"""
+        with self.lock:
+            platforms = self.jobs.get(job_id)
+            if platforms is None:
+                return None
+            # A shared entry may have been finished by the job it belongs to
+            self._check_finished(job_id)
+            return {platform: dict(entry) for platform, entry in platforms.items()}
+
+    def is_done(self, job_id: str) -> bool:
+        """True if the job is unknown or every platform has completed or failed"""
+        with self.lock:
+            platforms = self.jobs.get(job_id)
+            return not platforms or all(entry['status'] in DONE_STATUSES for entry in platforms.values())
+
+    def subscribe(self, job_id: str, max_events: int = 1000) -> queue.Queue:
+        """Queue receiving the job's events as {'event': name, 'data': payload} dicts"""
+        events = queue.Queue(maxsize=max_events)
+        with self.lock:
+            self.subscribers.setdefault(job_id, []).append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: queue.Queue):
+        with self.lock:
+            subscribers = self.subscribers.get(job_id, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self.subscribers.pop(job_id, None)
+
+    def publish(self, job_id: str, event: str, data: Dict):
+        """Send an event to the job's subscribers and to those of jobs sharing its progress"""
+        with self.lock:
+            targets = [job_id] + list(self.followers.get(job_id, ()))
+            for target in targets:
+                payload = dict(data, job_id=target)
+                for events in self.subscribers.get(target, []):
+                    try:
+                        events.put_nowait({'event': event, 'data': payload})
+                    except queue.Full:
+                        pass  # A client that stopped reading loses events rather than blocking scrapes
+
+    def remove(self, job_id: str):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            self.finished.pop(job_id, None)
+            self.followers.pop(job_id, None)
+
+    def _check_finished(self, job_id: str):
+        platforms = self.jobs.get(job_id)
+        if job_id in self.finished or not platforms:
+            return
+        if all(entry['status'] in DONE_STATUSES for entry in platforms.values()):
+            self.finished[job_id] = time.time()
+
+    def _evict(self):
+        """Drop expired finished jobs, then the oldest jobs beyond max_jobs"""
+        cutoff = time.time() - self.ttl
+        while self.finished:
+            job_id, finished_at = next(iter(self.finished.items()))
+            if finished_at >= cutoff:
+                break
+            self.finished.popitem(last=False)
+            self.jobs.pop(job_id, None)
+            self.followers.pop(job_id, None)
+
+        while len(self.jobs) > self.max_jobs:
+            job_id, _ = self.jobs.popitem(last=False)
+            self.finished.pop(job_id, None)
+            self.followers.pop(job_id, None)
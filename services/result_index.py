@@ -0,0 +1,198 @@
+import bisect
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+# Sort options of the compare view ('' keeps the scraped order)
+SORT_OPTIONS = ('', 'price-asc', 'price-desc', 'rating', 'title')
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a title or search text"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class ResultIndex:
+    """
+    Precomputed sort orders over one result set, so filtered and sorted pages can be
+    cut without re-sorting, plus an inverted index of title tokens and a map of
+    product ids. Products of every platform share one position space.
+    """
+
+    def __init__(self, results: Dict[str, List]):
+        self.products = [product for products in results.values() for product in products]
+        count = len(self.products)
+
+        self.platforms = {}
+        start = 0
+        for platform, products in results.items():
+            mask = np.zeros(count, dtype=bool)
+            mask[start:start + len(products)] = True
+            self.platforms[platform] = mask
+            start += len(products)
+
+        self.titles = [(product.get('title') or '').lower() for product in self.products]
+
+        # Title token -> sorted positions, and (platform, asin/id) -> first position
+        postings = {}
+        self.ids = {}
+        position = 0
+        for platform, products in results.items():
+            for product in products:
+                for key in (product.get('asin'), product.get('id')):
+                    if key:
+                        self.ids.setdefault((platform, key), position)
+                for token in set(tokenize(self.titles[position])):
+                    postings.setdefault(token, []).append(position)
+                position += 1
+        self.postings = {token: np.array(positions, dtype=np.int64) for token, positions in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        # Rarer tokens say more about a product (inverse document frequency)
+        self.weights = {token: float(np.log((count + 1) / (len(positions) + 0.5)))
+                        for token, positions in self.postings.items()}
+
+        price = np.fromiter((p.get('price_numeric') or 0 for p in self.products), dtype=float, count=count)
+        rating = np.fromiter((p.get('rating_numeric') or 0 for p in self.products), dtype=float, count=count)
+
+        # Stable sorts; products without a price go last in both price orders
+        unpriced = price <= 0
+        self.orders = {
+            '': np.arange(count),
+            'price-asc': np.lexsort((price, unpriced)),
+            'price-desc': np.lexsort((-price, unpriced)),
+            'rating': np.argsort(-rating, kind='stable'),
+            'title': np.array(sorted(range(count), key=self.titles.__getitem__), dtype=np.int64)
+        }
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def lookup(self, platform: str, product_id: str):
+        """The product with this asin (or id) on `platform`, or None"""
+        position = self.ids.get((platform, product_id))
+        return self.products[position] if position is not None else None
+
+    def token_positions(self, prefix: str) -> np.ndarray:
+        """Sorted positions of the titles with a token starting with `prefix`"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + '\uffff', start)
+        if end - start == 1:
+            return self.postings[self.vocabulary[start]]
+        if end == start:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.postings[token] for token in self.vocabulary[start:end]]))
+
+    def search(self, text: str) -> Optional[np.ndarray]:
+        """
+        Positions of the titles that have a token starting with each word of `text`
+        (so a word still being typed matches), or None if `text` has no words
+        """
+        positions = None
+        # Rarest words first keeps the intersections small
+        for postings in sorted((self.token_positions(token) for token in set(tokenize(text))), key=len):
+            positions = postings if positions is None else np.intersect1d(positions, postings, assume_unique=True)
+            if not positions.size:
+                break
+        return positions
+
+    def match(self, platform: str = None, text: str = '') -> Optional[np.ndarray]:
+        """Mask of the products on `platform` whose title matches `text` (None = all)"""
+        mask = None
+        if platform:
+            mask = self.platforms.get(platform, np.zeros(len(self.products), dtype=bool))
+
+        positions = self.search(text)
+        if positions is not None:
+            matches = np.zeros(len(self.products), dtype=bool)
+            matches[positions] = True
+            mask = matches if mask is None else mask & matches
+        return mask
+
+    def similar(self, platform: str, product_id: str, target: str = None, limit: int = 10) -> Optional[List[Dict]]:
+        """
+        Products whose titles share the most (IDF-weighted) tokens with the given one,
+        optionally only those on `target`. None if the product is not in the result set.
+        """
+        position = self.ids.get((platform, product_id))
+        if position is None:
+            return None
+
+        tokens = set(tokenize(self.titles[position]))
+        if not tokens:
+            return []
+        postings = [self.postings[token] for token in tokens]
+        weights = [np.full(len(p), self.weights[token]) for token, p in zip(tokens, postings)]
+        scores = np.bincount(np.concatenate(postings), weights=np.concatenate(weights), minlength=len(self.products))
+        scores[position] = 0
+        if target:
+            scores[~self.platforms.get(target, np.zeros(len(self.products), dtype=bool))] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [{'product': self.products[c], 'score': round(float(scores[c]), 4)} for c in candidates]
+
+    def query(self, sort: str = '', platform: str = None, text: str = '', cursor: int = 0, limit: int = 50) -> Dict:
+        """
+        One page of matching products in `sort` order. `cursor` is a position in that
+        order (the next_cursor of the previous page); next_cursor is None on the last page.
+        """
+        order = self.orders[sort]
+        mask = self.match(platform, text)
+
+        if mask is None:
+            positions = order[cursor:cursor + limit]
+            total = len(order)
+            next_cursor = cursor + limit if cursor + limit < total else None
+        else:
+            matched = np.flatnonzero(mask[order[cursor:]])
+            page = matched[:limit]
+            positions = order[cursor + page]
+            total = int(mask.sum())
+            next_cursor = cursor + int(page[-1]) + 1 if len(matched) > limit else None
+
+        return {
+            'products': [self.products[position] for position in positions],
+            'total': total,
+            'next_cursor': next_cursor
+        }
+
+
+class ResultIndexCache:
+    """ResultIndex per result set, built once when the result set is complete (LRU of `max_entries`)"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def build(self, result_id: str, results: Dict[str, List]) -> ResultIndex:
+        index = ResultIndex(results)
+        with self.lock:
+            self.entries[result_id] = index
+            self.entries.move_to_end(result_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return index
+
+    def get(self, result_id: str, load: Callable[[], Optional[Dict[str, List]]] = None) -> Optional[ResultIndex]:
+        """Cached index; on a miss, load() the result set (None if it is gone) and index it"""
+        with self.lock:
+            index = self.entries.get(result_id)
+            if index is not None:
+                self.entries.move_to_end(result_id)
+                return index
+
+        results = load() if load else None
+        if results is None:
+            return None
+        return self.build(result_id, results)
+
+    def discard(self, result_id: str):
+        with self.lock:
+            self.entries.pop(result_id, None)
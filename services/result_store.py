@@ -0,0 +1,56 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from .job_store import JobStore
+
+
+class ResultStore:
+    """
+    Server-side home for /search results, so the cookie session only holds a result id.
+
+    Result sets are written to a JobStore (which applies its TTL/size retention) and the
+    most recently used ones are kept decoded in a small in-process LRU.
+    """
+
+    def __init__(self, job_store: JobStore, max_cached: int = 16):
+        self.job_store = job_store
+        self.max_cached = max_cached
+        self.cached = OrderedDict()
+        self.lock = threading.Lock()
+
+    def save(self, query: str, results: Dict[str, List[Dict]]) -> str:
+        """Store a result set and return its id"""
+        result_id = uuid.uuid4().hex
+        self.job_store.create_job(result_id, query, list(results))
+        for platform, products in results.items():
+            self.job_store.save_results(result_id, platform, products)
+        self.job_store.finish_job(result_id)
+        self._remember(result_id, results)
+        return result_id
+
+    def load(self, result_id: str) -> Optional[Dict[str, List[Dict]]]:
+        """Products of a stored result set grouped by platform, or None if it was evicted"""
+        with self.lock:
+            if result_id in self.cached:
+                self.cached.move_to_end(result_id)
+                return self.cached[result_id]
+
+        if self.job_store.get_job(result_id) is None:
+            return None
+
+        results = self.job_store.get_all_products(result_id)
+        self._remember(result_id, results)
+        return results
+
+    def delete(self, result_id: str):
+        with self.lock:
+            self.cached.pop(result_id, None)
+        self.job_store.delete_job(result_id)
+
+    def _remember(self, result_id: str, results: Dict[str, List[Dict]]):
+        with self.lock:
+            self.cached[result_id] = results
+            self.cached.move_to_end(result_id)
+            while len(self.cached) > self.max_cached:
+                self.cached.popitem(last=False)
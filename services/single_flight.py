@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    """One in-flight call; `context` is whatever the leader registered (e.g. its progress key)"""
+
+    def __init__(self, context=None):
+        self.future = Future()
+        self.context = context
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time. Callers that arrive with the same key
+    while it is running wait for the leader and get the same result.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        self.counters = {'leaders': 0, 'coalesced': 0}
+
+    def _join_or_lead(self, key: str, context) -> Tuple[_Call, bool]:
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.counters['coalesced'] += 1
+                return call, False
+            call = _Call(context)
+            self.calls[key] = call
+            self.counters['leaders'] += 1
+            return call, True
+
+    def _done(self, key: str):
+        with self.lock:
+            self.calls.pop(key, None)
+
+    def do(self, key: str, fn: Callable[[], Any], context=None, on_join: Callable[[Any], None] = None):
+        """Call fn() unless an identical call is running; on_join(leader context) runs for followers"""
+        call, leader = self._join_or_lead(key, context)
+
+        if not leader:
+            if on_join:
+                on_join(call.context)
+            return call.future.result()
+
+        try:
+            result = fn()
+            call.future.set_result(result)
+            return result
+        except BaseException as e:
+            call.future.set_exception(e)
+            raise
+        finally:
+            self._done(key)
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable], context=None, on_join: Callable[[Any], None] = None):
+        """do() for coroutines; followers wait without blocking the event loop"""
+        call, leader = self._join_or_lead(key, context)
+
+        if not leader:
+            if on_join:
+                on_join(call.context)
+            return await asyncio.wrap_future(call.future)
+
+        try:
+            result = await fn()
+            call.future.set_result(result)
+            return result
+        except BaseException as e:
+            call.future.set_exception(e)
+            raise
+        finally:
+            self._done(key)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            stats = dict(self.counters)
+            stats['in_flight'] = len(self.calls)
+        return stats
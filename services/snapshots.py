@@ -0,0 +1,127 @@
+import hashlib
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from models import as_dict
+from .cache import CacheBackend
+from .metrics import metrics
+
+REFRESH_PAGES = metrics.counter('incremental_refresh_pages_total',
+                                'Pages fetched by incremental refreshes, by comparison with the snapshot',
+                                ('platform', 'result'))
+
+
+def page_hash(products: List) -> str:
+    """Hash of a page's product ids and prices, in page order"""
+    digest = hashlib.sha1()
+    for product in products:
+        digest.update(f"{product.get('asin')}:{product.get('price_numeric')}\n".encode())
+    return digest.hexdigest()
+
+
+def diff_products(old: Iterable, new: Iterable) -> Dict:
+    """Products added, removed and with a changed price between two scrapes (matched by asin)"""
+    old_by_id = {product.get('asin'): product for product in old}
+    new_by_id = {product.get('asin'): product for product in new}
+
+    price_changed = []
+    for asin, product in new_by_id.items():
+        previous = old_by_id.get(asin)
+        if previous is not None and previous.get('price_numeric') != product.get('price_numeric'):
+            price_changed.append({
+                'asin': asin,
+                'title': product.get('title'),
+                'old_price': previous.get('price_numeric'),
+                'new_price': product.get('price_numeric'),
+                'product': product
+            })
+
+    return {
+        'added': [product for asin, product in new_by_id.items() if asin not in old_by_id],
+        'removed': [product for asin, product in old_by_id.items() if asin not in new_by_id],
+        'price_changed': price_changed
+    }
+
+
+class SnapshotStore:
+    """
+    Last scrape of each (platform, query), page by page with a content hash per page.
+
+    refresh() re-scrapes in page order and stops once `unchanged_pages` pages in a row
+    hash the same as the snapshot; the snapshot's later pages are assumed unchanged.
+    Snapshots are kept per page limit, like cached results, in a CacheBackend (memory
+    or SQLite) without expiry.
+    """
+
+    def __init__(self, backend: CacheBackend, unchanged_pages: int = 2):
+        self.backend = backend
+        self.unchanged_pages = max(1, unchanged_pages)
+
+    @staticmethod
+    def make_key(platform: str, query: str, max_pages: Optional[int]) -> str:
+        normalized = ' '.join(query.lower().split())
+        return f"{platform}|{normalized}|{max_pages or 'all'}"
+
+    def get(self, platform: str, query: str, max_pages: Optional[int]) -> Optional[Tuple[List[Dict], float]]:
+        """(pages, stored_at) of the last snapshot, or None"""
+        return self.backend.get(self.make_key(platform, query, max_pages))
+
+    def refresh(self, platform: str, query: str, max_pages: Optional[int], pages: Iterable[Tuple[int, List]],
+                stop_reason: Callable[[], Optional[str]] = None) -> Dict:
+        """
+        Consume (page, products) pairs from a scrape of up to `max_pages` pages, update
+        the snapshot and return what changed since the last one. The first refresh of a
+        query is a full scrape and reports every product as added.
+        stop_reason() gives the scraper's stop_reason once the pages are consumed; unless
+        the scrape ran to the end of the results, the snapshot's later pages are kept.
+        """
+        previous = self.get(platform, query, max_pages)
+        old_pages = {entry['page']: entry for entry in previous[0]} if previous else {}
+
+        new_pages = []
+        unchanged = 0
+        stopped_early = False
+        iterator = iter(pages)
+        try:
+            for page, products in iterator:
+                digest = page_hash(products)
+                old_page = old_pages.get(page)
+                if old_page is None:
+                    result = 'new'
+                elif old_page['hash'] == digest:
+                    result = 'unchanged'
+                else:
+                    result = 'changed'
+                REFRESH_PAGES.inc(platform=platform, result=result)
+
+                new_pages.append({'page': page, 'hash': digest, 'products': [as_dict(p) for p in products]})
+                unchanged = unchanged + 1 if result == 'unchanged' else 0
+                if unchanged >= self.unchanged_pages:
+                    stopped_early = True
+                    break
+        finally:
+            # Stop the scrape (and its pages in flight) when we stop early
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+        if not new_pages:
+            print(f"⚠️ Refresh of {platform} '{query}' got no pages, keeping the previous snapshot")
+            return {'first_run': previous is None, 'pages_fetched': 0, 'stopped_early': False,
+                    'added': [], 'removed': [], 'price_changed': [], 'total': None}
+
+        pages_fetched = len(new_pages)
+        if stopped_early or not stop_reason or stop_reason() != 'end_of_results':
+            # Pages after the last one fetched (stopped, failed or beyond the page limit) are carried over
+            last_page = new_pages[-1]['page']
+            new_pages.extend(entry for page, entry in sorted(old_pages.items()) if page > last_page)
+
+        diff = diff_products((p for entry in old_pages.values() for p in entry['products']),
+                             (p for entry in new_pages for p in entry['products']))
+        self.backend.set(self.make_key(platform, query, max_pages), new_pages, time.time())
+
+        diff.update({
+            'first_run': previous is None,
+            'pages_fetched': pages_fetched,
+            'stopped_early': stopped_early,
+            'total': sum(len(entry['products']) for entry in new_pages)
+        })
+        return diff